@@ -0,0 +1,243 @@
+"""Benchmarks how graph.random_planar_graph scales with n, s and connected.
+
+Every run uses a fixed seed, so results are reproducible and can be diffed between releases.
+The results are written as JSON, either to stdout or to the file given by --output.
+Each result counts the candidate edges that the search reached, split into the accepted ones and those
+rejected for a crossing or a narrow angle, and the candidates that were screened ahead of where it stopped.
+With --method delaunay, the candidates are the triangulation's edges, and the counts that don't apply are null.
+
+Example:
+
+    python benchmarks/bench_random_planar_graph.py --n 10 100 500 --s 0.0 0.3 --output before.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import networkx as nx
+import numpy as np
+
+# Benchmark the working tree rather than whichever version happens to be installed.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from graphquest import graph
+
+
+class __Probe:
+    """Wraps the stages of random_planar_graph to time them and count candidate edges.
+
+    The greedy method pulls candidates into batches that are screened for crossings before the main loop
+    tests them one by one, so a batch can run past the candidate that the search stops at.
+    Only the candidates up to that one are counted as candidates, and the rest as `screened_ahead`.
+    The Delaunay method's candidates are the edges of the triangulation, which are never screened or tested
+    for crossings. An edge that it leaves out may have been rejected for its angles or left out to meet `s`,
+    so those rejections are not broken down.
+    """
+    def __init__(self):
+        self.timings = {}
+        self.counts = {}
+        self.originals = {}
+        self.index = {}
+        self.batches = []
+        self.last = -1
+
+    def reset(self):
+        self.timings = {'positions': 0.0, 'sorting': 0.0, 'triangulation': 0.0, 'planarity': 0.0, 'angles': 0.0}
+        self.counts = {'pulled': 0, 'triangulated': 0, 'crossing': 0, 'narrow_angle': 0}
+        # The index of each candidate, the screening result of each batch (with the index of its first candidate)
+        # and the index of the last candidate that the main loop tested.
+        self.index = {}
+        self.batches = []
+        self.last = -1
+
+    def candidate_counts(self, G, n, s, connected, method) -> dict:
+        """Returns the number of candidates that the search reached, the crossing and angle rejections among them,
+        and the number of candidates that were only screened ahead of where the search stopped.
+        The counts that don't apply to the method are `None`."""
+        if method == 'delaunay':
+            return {'candidates': self.counts['triangulated'], 'rejected_crossing': None, 'rejected_angle': None,
+                    'screened_ahead': None}
+        # No edge is accepted after the last candidate that the main loop tested, so from then on the search
+        # stops at the first candidate whose index exceeds s times the number of pairs, once the final graph
+        # has every node and few enough components. Otherwise it runs through every candidate.
+        reached = self.counts['pulled']
+        if G.number_of_nodes() == n and nx.number_connected_components(G) <= (1 if connected else n):
+            reached = min(max(self.last, math.floor(s * (n * (n - 1) // 2)) + 1) + 1, reached)
+        screened_out = sum(int(crossing[:max(reached - offset, 0)].sum()) for offset, crossing in self.batches)
+        return {
+            'candidates': reached,
+            'rejected_crossing': screened_out + self.counts['crossing'],
+            'rejected_angle': self.counts['narrow_angle'],
+            'screened_ahead': self.counts['pulled'] - reached,
+        }
+
+    def __timed(self, stage, f):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = f(*args, **kwargs)
+            self.timings[stage] += time.perf_counter() - start
+            return result
+        return wrapper
+
+    def __timed_stream(self, f):
+        def wrapper(*args, **kwargs):
+            stream = f(*args, **kwargs)
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(stream)
+                except StopIteration:
+                    return
+                finally:
+                    self.timings['sorting'] += time.perf_counter() - start
+                self.index[item] = self.counts['pulled']
+                self.counts['pulled'] += 1
+                yield item
+        return wrapper
+
+    def __triangulating(self, f):
+        def wrapper(*args):
+            result = f(*args)
+            self.counts['triangulated'] += len(result)
+            return result
+        return wrapper
+
+    def __screening(self, f):
+        def wrapper(segments, edges, *args):
+            # The batch has just been pulled from the candidate stream.
+            result = f(segments, edges, *args)
+            self.batches.append((self.counts['pulled'] - len(edges), result))
+            return result
+        return wrapper
+
+    def __testing(self, f):
+        def wrapper(segments, edge, *args):
+            result = f(segments, edge, *args)
+            self.last = max(self.last, self.index[tuple(edge)])
+            self.counts['crossing'] += bool(result)
+            return result
+        return wrapper
+
+    def __admitting(self, f):
+        def wrapper(*args):
+            result = f(*args)
+            self.counts['narrow_angle'] += not result
+            return result
+        return wrapper
+
+    def install(self):
+        module = vars(graph)
+        self.originals = {
+            'positions': module['__random_positions'],
+            'candidates': module['__candidate_edges'],
+            'triangulation': module['__delaunay_edges'],
+            'crosses': graph._SegmentSet.crosses,
+            'crossing': graph._SegmentSet.crossing,
+            'admits': graph._AngularIndex.admits,
+        }
+        module['__random_positions'] = self.__timed('positions', self.originals['positions'])
+        module['__candidate_edges'] = self.__timed_stream(self.originals['candidates'])
+        module['__delaunay_edges'] = self.__timed('triangulation', self.__triangulating(self.originals['triangulation']))
+        graph._SegmentSet.crosses = self.__timed('planarity', self.__testing(self.originals['crosses']))
+        graph._SegmentSet.crossing = self.__timed('planarity', self.__screening(self.originals['crossing']))
+        graph._AngularIndex.admits = self.__timed('angles', self.__admitting(self.originals['admits']))
+
+    def uninstall(self):
+        module = vars(graph)
+        module['__random_positions'] = self.originals['positions']
+        module['__candidate_edges'] = self.originals['candidates']
+        module['__delaunay_edges'] = self.originals['triangulation']
+        graph._SegmentSet.crosses = self.originals['crosses']
+        graph._SegmentSet.crossing = self.originals['crossing']
+        graph._AngularIndex.admits = self.originals['admits']
+
+
+def __run(probe, n, s, connected, seed, method, memory):
+    probe.reset()
+    start = time.perf_counter()
+    G = graph.random_planar_graph(n, connected=connected, s=s, seed=seed, method=method)
+    wall = time.perf_counter() - start
+    counts = probe.candidate_counts(G, n, s, connected, method)
+    result = {
+        'n': n,
+        's': s,
+        'connected': connected,
+        'seed': seed,
+        'method': method,
+        'wall_time': wall,
+        'stage_times': dict(probe.timings),
+        'candidates': counts['candidates'],
+        'accepted': G.number_of_edges(),
+        'rejected': counts['candidates'] - G.number_of_edges(),
+        'rejected_crossing': counts['rejected_crossing'],
+        'rejected_angle': counts['rejected_angle'],
+        'screened_ahead': counts['screened_ahead'],
+        'is_connected': G.number_of_nodes() > 0 and nx.is_connected(G),
+    }
+
+    if memory:
+        # Measured in a separate run, since tracemalloc distorts the timings.
+        probe.uninstall()
+        tracemalloc.start()
+        graph.random_planar_graph(n, connected=connected, s=s, seed=seed, method=method)
+        result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        probe.install()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n', type=int, nargs='+', default=[10, 50, 100, 500, 1000, 2000, 5000],
+                        help='numbers of nodes to sweep')
+    parser.add_argument('--s', type=float, nargs='+', default=[0.0, 0.3, 0.6, 1.0],
+                        help='sparseness values to sweep')
+    parser.add_argument('--connected', choices=['true', 'false', 'both'], default='both',
+                        help='whether to require connected graphs')
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0, 1, 2],
+                        help='the seeds to run each configuration with')
+    parser.add_argument('--method', choices=['greedy', 'delaunay'], default='greedy',
+                        help='the generation method to benchmark')
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help='skip the (slower) peak memory measurement')
+    parser.add_argument('--output', help='file to write the JSON results to (default: stdout)')
+    args = parser.parse_args()
+
+    connected = {'true': [True], 'false': [False], 'both': [True, False]}[args.connected]
+
+    probe = __Probe()
+    probe.install()
+    results = []
+    try:
+        for n in args.n:
+            for s in args.s:
+                for c in connected:
+                    for seed in args.seeds:
+                        results.append(__run(probe, n, s, c, seed, args.method, args.memory))
+                        print(f'n={n} s={s} connected={c} seed={seed}: {results[-1]["wall_time"]:.3f}s',
+                              file=sys.stderr)
+    finally:
+        probe.uninstall()
+
+    report = {
+        'benchmark': 'random_planar_graph',
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'networkx': nx.__version__,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == '__main__':
+    main()
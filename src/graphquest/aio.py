@@ -0,0 +1,170 @@
+"""Coroutine versions of the question lifecycle functions, for use in asyncio servers.
+
+The question's methods are run in an executor, so they don't block the event loop.
+By default this is a thread pool shared by the whole process, which can be replaced with `set_executor()`
+(e.g. with a `concurrent.futures.ProcessPoolExecutor`, so that CPU-bound questions don't hold the GIL).
+The number of instances of a question class that are generated or graded at the same time
+can be limited with `set_limit()`.
+
+Cancelling a call (or its timeout expiring) cancels it if it hasn't started yet.
+A question method that is already running can't be interrupted, so it runs to completion in the background,
+and keeps its place in the class's concurrency limit until then.
+"""
+import asyncio
+import concurrent.futures
+import weakref
+
+from graphquest import lifecycle
+
+__executor = None
+
+__default_executor = None
+
+__limits = {}
+
+# The semaphores enforcing the limits, per event loop (since asyncio primitives can't be shared between loops)
+__semaphores = weakref.WeakKeyDictionary()
+
+
+def set_executor(executor: concurrent.futures.Executor | None):
+    """Set the executor that question methods are run in.
+
+    Parameters
+    ----------
+    executor : None | concurrent.futures Executor
+        The executor. If `None`, a thread pool shared by the whole process is used.
+        A process pool requires the question classes to be defined at the top level of a module,
+        and can't share a `SolutionCache` between its processes unless it is stored in a file.
+    """
+    global __executor
+    __executor = executor
+
+
+def set_limit(cls: type, limit: int | None):
+    """Limit the number of instances of a question class that are generated or graded at the same time.
+
+    Parameters
+    ----------
+    cls : type
+        The question class.
+
+    limit : None | int
+        The maximum number of concurrent calls, or `None` for no limit.
+        Calls that are already running aren't affected.
+    """
+    assert limit is None or limit > 0, 'limit must be positive'
+    if limit is None:
+        __limits.pop(cls, None)
+    else:
+        __limits[cls] = limit
+    for semaphores in __semaphores.values():
+        semaphores.pop(cls, None)
+
+
+def __get_executor(executor):
+    global __default_executor
+    if executor is None:
+        executor = __executor
+    if executor is None:
+        if __default_executor is None:
+            __default_executor = concurrent.futures.ThreadPoolExecutor(thread_name_prefix='graphquest')
+        executor = __default_executor
+    return executor
+
+
+def __semaphore(cls: type) -> asyncio.Semaphore | None:
+    if cls not in __limits:
+        return None
+    semaphores = __semaphores.setdefault(asyncio.get_running_loop(), {})
+    if cls not in semaphores:
+        semaphores[cls] = asyncio.Semaphore(__limits[cls])
+    return semaphores[cls]
+
+
+async def __run(cls: type, executor, function, *args):
+    """Runs a function in an executor, within the concurrency limit of a question class."""
+    loop = asyncio.get_running_loop()
+    semaphore = __semaphore(cls)
+    if semaphore is not None:
+        await semaphore.acquire()
+    try:
+        future = __get_executor(executor).submit(function, *args)
+    except BaseException:
+        if semaphore is not None:
+            semaphore.release()
+        raise
+
+    if semaphore is not None:
+        # The slot is held until the function actually finishes, even if the call is cancelled first.
+        def release(_):
+            try:
+                loop.call_soon_threadsafe(semaphore.release)
+            except RuntimeError:
+                # The event loop has been closed.
+                pass
+        future.add_done_callback(release)
+    return await asyncio.wrap_future(future)
+
+
+def _grade(instance: lifecycle.Instance, answer):
+    """Grades an answer, also returning the highlighted nodes and edges, which a worker process can't update."""
+    correct, feedback = lifecycle.grade(instance, answer)
+    return correct, feedback, instance.question.highlighted_nodes, instance.question.highlighted_edges
+
+
+async def generate(cls: type, cache=None, timeout=None, executor=None) -> lifecycle.Instance:
+    """Generate an instance of a question class without blocking the event loop (see `lifecycle.generate()`).
+
+    Parameters
+    ----------
+    cls : type
+        The question class.
+
+    cache : None | SolutionCache
+        A cache to reuse solutions from.
+
+    timeout : None | float
+        The number of seconds to wait, after which an `asyncio.TimeoutError` is raised.
+        The time spent waiting for the class's concurrency limit is included.
+
+    executor : None | concurrent.futures Executor
+        The executor to use for this call, instead of the one given to `set_executor()`.
+
+    Returns
+    -------
+    instance : Instance
+        The generated instance.
+    """
+    return await asyncio.wait_for(__run(cls, executor, lifecycle.generate, cls, cache), timeout)
+
+
+async def grade(instance: lifecycle.Instance, answer, timeout=None, executor=None) -> (bool, str):
+    """Verify a student's answer without blocking the event loop (see `lifecycle.grade()`).
+
+    Parameters
+    ----------
+    instance : Instance
+        The question instance.
+
+    answer : any
+        The student's answer.
+
+    timeout : None | float
+        The number of seconds to wait, after which an `asyncio.TimeoutError` is raised.
+        The time spent waiting for the class's concurrency limit is included.
+
+    executor : None | concurrent.futures Executor
+        The executor to use for this call, instead of the one given to `set_executor()`.
+
+    Returns
+    -------
+    (correct, feedback) : (bool, str)
+        Whether the answer is correct, and the feedback to show.
+    """
+    cls = type(instance.question)
+    correct, feedback, nodes, edges = await asyncio.wait_for(
+        __run(cls, executor, _grade, instance, answer), timeout)
+    if instance.question.feedback:
+        instance.question.highlighted_nodes = nodes
+        instance.question.highlighted_edges = edges
+    return correct, feedback
@@ -0,0 +1,363 @@
+"""Running the question lifecycle in supervised worker processes, with time and memory budgets.
+
+Each of the question's methods (`generate_data()`, `generate_question()`, `generate_solutions()`
+and `generate_feedback()`) is a stage, and can be given a budget of wall time, CPU time and memory.
+The stages run in worker processes:
+
+* the wall time is enforced by the supervisor, which kills the worker when a stage overruns;
+* the CPU time is enforced in the worker with a CPU time interval timer (`ITIMER_PROF`), which interrupts the stage;
+* the memory is enforced in the worker with a resource limit (`RLIMIT_AS`), which makes allocations fail.
+
+A stage that is stuck in a long-running C function can't be interrupted until it returns,
+so a wall time budget should also be given to bound it.
+
+Either way, a `BudgetExceeded` error is raised, and the worker is replaced with a new one.
+Workers are also replaced after a number of tasks, so memory leaked by question code doesn't accumulate.
+Interval timers and resource limits are only available on Unix: elsewhere, only the wall time
+and the CPU time (measured once the stage has finished) are enforced.
+"""
+import multiprocessing
+import os
+import queue
+import signal
+import time
+
+from graphquest import lifecycle
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+STAGES = ('generate_data', 'generate_question', 'generate_solutions', 'generate_feedback')
+
+
+class Budget:
+    """The resources a stage of the question lifecycle may use.
+
+    Parameters
+    ----------
+    wall : None | float
+        The maximum number of seconds the stage may take.
+
+    cpu : None | float
+        The maximum number of seconds of CPU time the stage may use.
+
+    memory : None | int
+        The maximum number of bytes of memory the stage may allocate (as virtual address space).
+    """
+    def __init__(self, wall=None, cpu=None, memory=None):
+        assert all(limit is None or limit > 0 for limit in (wall, cpu, memory)), 'budgets must be positive'
+        self.wall = wall
+        self.cpu = cpu
+        self.memory = memory
+
+    def __repr__(self):
+        return f'Budget(wall={self.wall!r}, cpu={self.cpu!r}, memory={self.memory!r})'
+
+
+class BudgetExceeded(Exception):
+    """Raised when a stage of the question lifecycle exceeds its budget.
+
+    Attributes
+    ----------
+    stage : str
+        The stage, e.g. `'generate_data'`.
+
+    resource : str
+        The resource that was exceeded: `'wall'`, `'cpu'` or `'memory'`.
+
+    limit : float | int
+        The budget for that resource.
+
+    used : None | float
+        The amount used when the stage was stopped, if it is known.
+    """
+    def __init__(self, stage: str, resource: str, limit, used=None):
+        self.stage = stage
+        self.resource = resource
+        self.limit = limit
+        self.used = used
+        used = '' if used is None else f' (used {used:.3g})'
+        super().__init__(f'{stage} exceeded its {resource} budget of {limit}{used}')
+
+    def __reduce__(self):
+        return BudgetExceeded, (self.stage, self.resource, self.limit, self.used)
+
+
+class _CpuExceeded(BaseException):
+    """Raised in a worker by the SIGPROF handler. It isn't an `Exception`, so question code doesn't catch it."""
+
+
+def _on_cpu_exceeded(signum, frame):
+    raise _CpuExceeded
+
+
+def _address_space() -> int:
+    """Returns the size of the current process's virtual address space in bytes."""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[0]) * resource.getpagesize()
+
+
+def _run_stage(connection, budgets: dict, stage: str, method, *args):
+    """Runs a question method in a worker, within the stage's CPU and memory budgets."""
+    budget = budgets.get(stage)
+    connection.send(('stage', stage))
+    if budget is None:
+        return method(*args)
+
+    timer = budget.cpu is not None and hasattr(signal, 'setitimer')
+    limits = None
+    if resource is not None and budget.memory is not None and os.path.exists('/proc/self/statm'):
+        limits = resource.getrlimit(resource.RLIMIT_AS)
+        soft = _address_space() + budget.memory
+        resource.setrlimit(resource.RLIMIT_AS, (soft if limits[1] == resource.RLIM_INFINITY else min(soft, limits[1]),
+                                                limits[1]))
+
+    start = time.process_time()
+    if timer:
+        signal.setitimer(signal.ITIMER_PROF, budget.cpu)
+    try:
+        result = method(*args)
+    except _CpuExceeded:
+        raise BudgetExceeded(stage, 'cpu', budget.cpu, time.process_time() - start) from None
+    except MemoryError:
+        if limits is None:
+            raise
+        raise BudgetExceeded(stage, 'memory', budget.memory) from None
+    finally:
+        if timer:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+        if limits is not None:
+            resource.setrlimit(resource.RLIMIT_AS, limits)
+
+    used = time.process_time() - start
+    if budget.cpu is not None and used > budget.cpu:
+        raise BudgetExceeded(stage, 'cpu', budget.cpu, used)
+    return result
+
+
+def _generate(connection, budgets: dict, cls: type) -> bytes:
+    """Generates a serialized instance in a worker (see `lifecycle.generate()`)."""
+    def generate_data():
+        question = cls()
+        return question, question.generate_data()
+
+    question, graphs = _run_stage(connection, budgets, 'generate_data', generate_data)
+    graphs = lifecycle.freeze(graphs)
+    description = _run_stage(connection, budgets, 'generate_question', question.generate_question,
+                             lifecycle.view(graphs))
+    solutions = None
+    if not question.feedback:
+        solutions = _run_stage(connection, budgets, 'generate_solutions', question.generate_solutions,
+                               lifecycle.view(graphs))
+    artifacts = question.__dict__.pop('_artifacts', None)
+    return lifecycle.Instance(question, graphs, description, solutions, artifacts=artifacts).dumps(binary=True)
+
+
+def _grade(connection, budgets: dict, cls: type, data: bytes, answer):
+    """Grades an answer to a question that gives feedback in a worker (see `lifecycle.grade()`)."""
+    instance = lifecycle.Instance.loads(data, cls)
+
+    def generate_feedback():
+        question = cls()
+        question.__dict__.update(vars(instance.question))
+        question.__dict__['_artifacts'] = instance.artifacts
+        return question, question.generate_feedback(lifecycle.view(instance.graphs), answer)
+
+    question, (correct, feedback) = _run_stage(connection, budgets, 'generate_feedback', generate_feedback)
+    return correct, feedback, question.highlighted_nodes, question.highlighted_edges
+
+
+def _work(connection):
+    """The main loop of a worker process."""
+    lifecycle._reseed()
+    if hasattr(signal, 'setitimer'):
+        signal.signal(signal.SIGPROF, _on_cpu_exceeded)
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            return
+        function, budgets, *args = task
+        try:
+            result = ('done', function(connection, budgets, *args))
+        except BudgetExceeded as e:
+            result = ('exceeded', e)
+        except Exception as e:
+            result = ('error', e)
+        try:
+            connection.send(result)
+        except Exception as e:
+            # The result or exception can't be pickled.
+            connection.send(('error', RuntimeError(f'{type(e).__name__}: {e}')))
+
+
+class _Worker:
+    def __init__(self, context):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_work, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        self.tasks = 0
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class Supervisor:
+    """Runs the question lifecycle in worker processes, enforcing a budget for each stage.
+
+    The methods are thread-safe, and run up to `workers` tasks at a time.
+
+    Parameters
+    ----------
+    budgets : None | Budget | dict[str, Budget]
+        The budget of every stage, or a dictionary mapping stage names (see `STAGES`) to their budgets.
+        Stages without a budget are unlimited.
+
+    workers : int
+        The maximum number of worker processes.
+
+    max_tasks : None | int
+        The number of tasks after which a worker is replaced with a new one, or `None` to keep it until it fails.
+        A worker is always replaced after a stage exceeds its budget.
+
+    context : None | str
+        The multiprocessing start method, e.g. `'spawn'`. If `spawn` or `forkserver` are used,
+        the question classes must be defined at the top level of a module.
+    """
+    def __init__(self, budgets=None, workers=1, max_tasks=100, context=None):
+        assert workers > 0, 'workers must be positive'
+        assert max_tasks is None or max_tasks > 0, 'max_tasks must be positive'
+        if isinstance(budgets, Budget):
+            budgets = dict.fromkeys(STAGES, budgets)
+        budgets = dict(budgets or {})
+        assert set(budgets) <= set(STAGES), f'unknown stages: {sorted(set(budgets) - set(STAGES))}'
+        self.budgets = budgets
+        self.workers = workers
+        self.max_tasks = max_tasks
+        self.__context = multiprocessing.get_context(context)
+        # Each slot holds an idle worker, or None if its worker hasn't been started (or has been replaced).
+        self.__idle = queue.LifoQueue()
+        for _ in range(workers):
+            self.__idle.put(None)
+        self.__closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop the idle worker processes. Workers that are still running a task are stopped when it finishes."""
+        self.__closed = True
+        while True:
+            try:
+                worker = self.__idle.get_nowait()
+            except queue.Empty:
+                return
+            if worker is not None:
+                worker.kill()
+
+    def __acquire(self) -> _Worker:
+        assert not self.__closed, 'the supervisor is closed'
+        worker = self.__idle.get()
+        if worker is None:
+            try:
+                worker = _Worker(self.__context)
+            except BaseException:
+                self.__idle.put(None)
+                raise
+        return worker
+
+    def __release(self, worker: _Worker, recycle: bool):
+        worker.tasks += 1
+        if recycle or self.__closed or self.max_tasks is not None and worker.tasks >= self.max_tasks:
+            worker.kill()
+            worker = None
+        if not self.__closed:
+            self.__idle.put(worker)
+
+    def __run(self, function, *args):
+        worker = self.__acquire()
+        recycle = True
+        try:
+            worker.connection.send((function, self.budgets, *args))
+            stage, deadline = None, None
+            while True:
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                if not worker.connection.poll(timeout):
+                    budget = self.budgets[stage]
+                    raise BudgetExceeded(stage, 'wall', budget.wall, budget.wall + time.monotonic() - deadline)
+                try:
+                    message, value = worker.connection.recv()
+                except EOFError:
+                    worker.process.join()
+                    raise RuntimeError(f'The worker process running {stage} exited with code '
+                                       f'{worker.process.exitcode}') from None
+                if message == 'stage':
+                    stage = value
+                    budget = self.budgets.get(stage)
+                    deadline = None if budget is None or budget.wall is None else time.monotonic() + budget.wall
+                elif message == 'exceeded':
+                    raise value
+                else:
+                    recycle = False
+                    if message == 'error':
+                        raise value
+                    return value
+        finally:
+            self.__release(worker, recycle)
+
+    def generate(self, cls: type) -> lifecycle.Instance:
+        """Generate an instance of a question class in a worker process (see `lifecycle.generate()`).
+
+        Parameters
+        ----------
+        cls : type
+            The question class.
+
+        Returns
+        -------
+        instance : Instance
+            The generated instance.
+
+        Raises
+        ------
+        BudgetExceeded
+            If a stage exceeds its budget.
+        """
+        return lifecycle.Instance.loads(self.__run(_generate, cls), cls)
+
+    def grade(self, instance: lifecycle.Instance, answer) -> (bool, str):
+        """Verify a student's answer in a worker process (see `lifecycle.grade()`).
+
+        Parameters
+        ----------
+        instance : Instance
+            The question instance.
+
+        answer : any
+            The student's answer.
+
+        Returns
+        -------
+        (correct, feedback) : (bool, str)
+            Whether the answer is correct, and the feedback to show.
+
+        Raises
+        ------
+        BudgetExceeded
+            If `generate_feedback()` exceeds its budget.
+        """
+        if not instance.question.feedback:
+            return lifecycle.grade(instance, answer)
+        cls = type(instance.question)
+        correct, feedback, nodes, edges = self.__run(_grade, cls, instance.dumps(binary=True), answer)
+        instance.question.highlighted_nodes = nodes
+        instance.question.highlighted_edges = edges
+        return correct, feedback
@@ -1,36 +1,419 @@
 """Functions for providing additional graph features on top of networkx."""
+import bisect
+import itertools
 import math
+import multiprocessing
 import networkx as nx
+import numbers
 import numpy as np
-import random
-from shapely import *
+import operator
+import os
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from shapely import MultiPoint, STRtree, delaunay_triangles, get_coordinates, linestrings
 
 # Dimensions of the cartesian coordinate space that the nodes occupy
 __WIDTH = 100
 __HEIGHT = 100
 
+# The number of nodes beyond which a scaled coordinate space grows, keeping the same density
+__CANVAS_NODES = 100
+
 # Minimum angle allowed between two edges (in radians)
 __ANGLE_TOLERANCE = (15 / 180) * math.pi
 
+# The number of candidate edges screened for crossings at once, which doubles up to the maximum
+__BATCH_SIZE = 64
+__MAX_BATCH_SIZE = 4096
+
+# Consecutive rejected draws before node placement starts over, and how many times it may do so
+__PLACEMENT_REJECTIONS = 1000
+__PLACEMENT_RESTARTS = 100
+
+
+def _orientation(p, q, r):
+    """Twice the signed area of the triangle `pqr`; positive if it turns anticlockwise."""
+    return (q[..., 0] - p[..., 0]) * (r[..., 1] - p[..., 1]) - (q[..., 1] - p[..., 1]) * (r[..., 0] - p[..., 0])
+
+
+def _on_segment(p, q, r):
+    """Whether `r` lies within the bounding box of the segment `pq` (assuming the three are collinear)."""
+    return (np.minimum(p[..., 0], q[..., 0]) <= r[..., 0]) & (r[..., 0] <= np.maximum(p[..., 0], q[..., 0])) & \
+        (np.minimum(p[..., 1], q[..., 1]) <= r[..., 1]) & (r[..., 1] <= np.maximum(p[..., 1], q[..., 1]))
+
+
+def _intersects(a, b, c, d):
+    """Whether each segment `ab` intersects the corresponding segment `cd` (including touching or overlapping)."""
+    o1, o2 = np.sign(_orientation(a, b, c)), np.sign(_orientation(a, b, d))
+    o3, o4 = np.sign(_orientation(c, d, a)), np.sign(_orientation(c, d, b))
+    hits = (o1 * o2 < 0) & (o3 * o4 < 0)
+    # Collinear points are rare, so only those pairs are tested for touching or overlapping.
+    collinear = np.flatnonzero((o1 == 0) | (o2 == 0) | (o3 == 0) | (o4 == 0))
+    if len(collinear):
+        a, b = np.broadcast_to(a, hits.shape + (2,))[collinear], np.broadcast_to(b, hits.shape + (2,))[collinear]
+        c, d = np.broadcast_to(c, hits.shape + (2,))[collinear], np.broadcast_to(d, hits.shape + (2,))[collinear]
+        o1, o2, o3, o4 = o1[collinear], o2[collinear], o3[collinear], o4[collinear]
+        hits[collinear] |= ((o1 == 0) & _on_segment(a, b, c)) | ((o2 == 0) & _on_segment(a, b, d)) | \
+            ((o3 == 0) & _on_segment(c, d, a)) | ((o4 == 0) & _on_segment(c, d, b))
+    return hits
+
+
+class _SegmentSet:
+    """A set of segments stored as contiguous endpoint arrays.
+
+    Candidate segments are tested in batches with `crossing()`, which uses an R-tree of the recorded segments
+    to find the nearby ones, or one at a time with `crosses()`, against the segments recorded since a given point.
+    Either way, the segments are then tested with vectorised orientation tests. Segments that touch or overlap count as intersecting,
+    which matches the behaviour of shapely's `intersects`.
+    """
+    def __init__(self):
+        self.count = 0
+        self.ends = np.empty((16, 2), dtype=np.intp)
+        self.starts_xy = np.empty((16, 2))
+        self.stops_xy = np.empty((16, 2))
+
+    def add(self, edge, p, q):
+        """Records the edge `edge`, which runs from `p` to `q`."""
+        if self.count == len(self.ends):
+            self.ends = np.concatenate([self.ends, np.empty_like(self.ends)])
+            self.starts_xy = np.concatenate([self.starts_xy, np.empty_like(self.starts_xy)])
+            self.stops_xy = np.concatenate([self.stops_xy, np.empty_like(self.stops_xy)])
+        self.ends[self.count] = edge
+        self.starts_xy[self.count] = p
+        self.stops_xy[self.count] = q
+        self.count += 1
+
+    def crossing(self, edges: np.ndarray, starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+        """Returns whether each of a batch of edges intersects a recorded edge that it shares no endpoint with."""
+        result = np.zeros(len(edges), dtype=bool)
+        if self.count == 0 or len(edges) == 0:
+            return result
+        tree = STRtree(linestrings(np.stack([self.starts_xy[:self.count], self.stops_xy[:self.count]], axis=1)))
+
+        # A long edge nearly always crosses an edge close to its start, so the recorded edges near the start
+        # (i.e. whose bounding boxes meet a short prefix of the edge) are tested first.
+        # Only the long edges that cross none of them are then tested against every edge along their length.
+        delta = stops - starts
+        length = np.hypot(delta[:, 0], delta[:, 1])
+        limit = 2 * np.median(np.hypot(*(self.stops_xy[:self.count] - self.starts_xy[:self.count]).T))
+        prefix = starts + delta * np.minimum(1, limit / np.maximum(length, 1e-12))[:, None]
+        self.__test(tree, edges, starts, stops, prefix, np.arange(len(edges)), result)
+        rest = np.flatnonzero(~result & (length > limit))
+        self.__test(tree, edges, starts, stops, stops, rest, result)
+        return result
+
+    def __test(self, tree, edges, starts, stops, ends, subset, result):
+        """Tests the given subset of a batch of edges against the recorded edges whose bounding boxes meet
+        the segments from `starts` to `ends`, marking the edges that intersect one in `result`."""
+        if len(subset) == 0:
+            return
+        candidates, recorded = tree.query(linestrings(np.stack([starts[subset], ends[subset]], axis=1)))
+        candidates = subset[candidates]
+        shared = self.ends[recorded]
+        pairs = edges[candidates]
+        apart = (shared != pairs[:, :1]).all(axis=1) & (shared != pairs[:, 1:]).all(axis=1)
+        candidates, recorded = candidates[apart], recorded[apart]
+        hits = _intersects(self.starts_xy[recorded], self.stops_xy[recorded], starts[candidates], stops[candidates])
+        result[candidates[hits]] = True
+
+    def crosses(self, edge, p, q, since=0) -> bool:
+        """Whether the edge `edge` from `p` to `q` intersects an edge recorded since the first `since`,
+        that it shares no endpoint with."""
+        idx = np.arange(since, self.count)
+        if len(idx) == 0:
+            return False
+        ends = self.ends[idx]
+        idx = idx[(ends != edge[0]).all(axis=1) & (ends != edge[1]).all(axis=1)]
+        hits = _intersects(self.starts_xy[idx], self.stops_xy[idx], np.asarray(p, dtype=float), np.asarray(q, dtype=float))
+        return bool(hits.any())
 
-def __random_positions(n: int):
-    """Randomly chooses node positions within the coordinate space."""
-    nodes = []
 
-    def valid(u):
-        for v in nodes:
-            if math.dist(u, v) < math.sqrt(__WIDTH ** 2 + __HEIGHT ** 2) / n:
+class _DisjointSet:
+    """Tracks the connected components of a graph on nodes `0..n-1` as edges are added."""
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+        self.size = [1] * n
+        self.components = n
+
+    def find(self, v: int) -> int:
+        """Returns the representative node of the component containing `v`."""
+        parent = self.parent
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    def union(self, u: int, v: int):
+        """Merges the components containing `u` and `v`."""
+        u, v = self.find(u), self.find(v)
+        if u == v:
+            return
+        if self.size[u] < self.size[v]:
+            u, v = v, u
+        self.parent[v] = u
+        self.size[u] += self.size[v]
+        self.components -= 1
+
+
+class _AngularIndex:
+    """The edges incident to each node, sorted by polar angle (i.e. in anticlockwise rotation order)."""
+    def __init__(self):
+        self.angles = {}
+        self.neighbours = {}
+
+    def __insert(self, u, v, p, q):
+        angle = math.atan2(q[1] - p[1], q[0] - p[0])
+        angles = self.angles.setdefault(u, [])
+        i = bisect.bisect(angles, angle)
+        angles.insert(i, angle)
+        self.neighbours.setdefault(u, []).insert(i, v)
+
+    def add(self, u, v, p, q):
+        """Records the edge between `u` at `p` and `v` at `q`."""
+        self.__insert(u, v, p, q)
+        self.__insert(v, u, q, p)
+
+    def admits(self, u, p, q, tolerance: float) -> bool:
+        """Whether an edge from `u` at `p` towards `q` would be more than `tolerance` radians from all of `u`'s edges."""
+        angles = self.angles.get(u)
+        if not angles:
+            return True
+        angle = math.atan2(q[1] - p[1], q[0] - p[0])
+        i = bisect.bisect(angles, angle)
+        # Only the edges either side of the new one in the rotation order can be the closest.
+        for other in (angles[i - 1], angles[i % len(angles)]):
+            gap = abs(angle - other) % (2 * math.pi)
+            if min(gap, 2 * math.pi - gap) <= tolerance:
                 return False
         return True
 
-    while len(nodes) < n:
-        m = (random.randint(0, __WIDTH), random.randint(0, __HEIGHT))
-        if valid(m):
-            nodes.append(m)
-    return {i: {'x': m[0], 'y': m[1]} for i, m in enumerate(nodes)}
+    def rotation(self, u) -> list:
+        """Returns the neighbours of `u` in anticlockwise order."""
+        return list(self.neighbours.get(u, []))
+
+
+class CompactGraph:
+    """A lightweight, immutable undirected graph whose nodes have positions.
+
+    The adjacency is stored in compressed sparse row (CSR) form: the neighbours of the node at
+    index `i` are `nodes[indices[indptr[i]:indptr[i + 1]]]`.
+    This is much smaller and faster to pickle than a networkx Graph.
+
+    Attributes
+    ----------
+    nodes : numpy array
+        The node labels, as an int32 array.
+
+    indptr : numpy array
+        The int32 array of offsets into `indices` for each node.
+
+    indices : numpy array
+        The int32 array of neighbour indices (i.e. positions in `nodes`, not labels).
+
+    xy : numpy array
+        The array of node coordinates, with shape `(len(nodes), 2)`.
+        It is an int64 array if the coordinates are given as integers, and a float array otherwise.
+    """
+    __slots__ = ('nodes', 'indptr', 'indices', 'xy')
+
+    def __init__(self, nodes, indptr, indices, xy):
+        xy = np.asarray(xy)
+        for name, value, dtype in (('nodes', nodes, np.int32), ('indptr', indptr, np.int32), ('indices', indices, np.int32),
+                                   ('xy', xy, np.int64 if np.issubdtype(xy.dtype, np.integer) else float)):
+            value = np.array(value, dtype=dtype)
+            value.flags.writeable = False
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, 'xy', self.xy.reshape(len(self.nodes), 2))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('CompactGraph is immutable')
+
+    def __reduce__(self):
+        return CompactGraph, (self.nodes, self.indptr, self.indices, self.xy)
+
+    def __repr__(self):
+        return f'CompactGraph with {self.number_of_nodes()} nodes and {self.number_of_edges()} edges'
+
+    @classmethod
+    def from_edges(cls, nodes, edges, xy) -> 'CompactGraph':
+        """Builds a compact graph from an `(m, 2)` array of edges given as indices into `nodes`."""
+        edges = np.asarray(edges, dtype=np.int32).reshape(-1, 2)
+        sources = np.concatenate([edges[:, 0], edges[:, 1]])
+        targets = np.concatenate([edges[:, 1], edges[:, 0]])
+        order = np.argsort(sources, kind='stable')
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(sources, minlength=len(nodes)), out=indptr[1:])
+        return cls(nodes, indptr, targets[order], xy)
+
+    @classmethod
+    def from_networkx(cls, G: nx.Graph) -> 'CompactGraph':
+        """Converts a networkx graph with integer nodes and `x`/`y` node attributes."""
+        index = {v: i for i, v in enumerate(G.nodes)}
+        edges = [(index[u], index[v]) for u, v in G.edges]
+        xy = [(d['x'], d['y']) for _, d in G.nodes(data=True)]
+        return cls.from_edges(list(G.nodes), edges, xy)
+
+    def to_networkx(self) -> nx.Graph:
+        """Converts to a networkx graph, with the coordinates stored as `x`/`y` node attributes."""
+        G = nx.Graph()
+        labels = self.nodes.tolist()
+        G.add_nodes_from((v, {'x': x, 'y': y}) for v, (x, y) in zip(labels, self.xy.tolist()))
+        G.add_edges_from((labels[u], labels[v]) for u, v in self.edges().tolist())
+        return G
+
+    def number_of_nodes(self) -> int:
+        return len(self.nodes)
+
+    def number_of_edges(self) -> int:
+        return len(self.indices) // 2
+
+    def edges(self) -> np.ndarray:
+        """Returns an `(m, 2)` array of the edges, as indices into `nodes`, with each edge listed once."""
+        sources = np.repeat(np.arange(len(self.nodes), dtype=np.int32), np.diff(self.indptr))
+        keep = sources < self.indices
+        return np.stack([sources[keep], self.indices[keep]], axis=1)
+
+
+def __random_positions(n: int, rng: np.random.Generator, width=__WIDTH, height=__HEIGHT, integral=True):
+    """Randomly chooses node positions within a `width` by `height` coordinate space.
+
+    Points are drawn uniformly (at integer coordinates if `integral`) and rejected if they lie closer than
+    `sqrt(width² + height²) / n` to an earlier point. Earlier points are bucketed in a background grid
+    with cells as wide as that distance, so each draw only needs to check the surrounding cells.
+
+    Raises a `ValueError` if the points cannot be placed, rather than searching forever.
+    """
+    if n == 0:
+        return {}
+    r = math.sqrt(width ** 2 + height ** 2) / n
+    columns, rows = math.floor(width) + 1, math.floor(height) + 1
+
+    # Disks of radius r/2 around the points must fit, disjointly, within the padded space.
+    if n * math.pi * (r / 2) ** 2 > (width + r) * (height + r) or (integral and n > columns * rows):
+        raise ValueError(f'Cannot place {n} nodes at least {r:.3g} apart in a {width:g}x{height:g} space')
+
+    def block():
+        # Points are drawn in blocks, since each call into the generator has a fixed overhead.
+        if integral:
+            return rng.integers(0, [columns, rows], size=(n, 2))
+        return rng.uniform(0, [width, height], size=(n, 2))
+
+    if integral and r <= 1:
+        # Any two distinct lattice points are far enough apart, so only repeated points are rejected.
+        # The blocks are drawn exactly as below, and the first occurrence of each point is kept,
+        # so the result is the same as rejecting the repeats one by one.
+        points = np.empty((0, 2), dtype=np.int64)
+        while True:
+            points = np.concatenate([points, block()])
+            _, first = np.unique(points, axis=0, return_index=True)
+            if len(first) >= n:
+                break
+        nodes = points[np.sort(first)[:n]].tolist()
+        return {i: {'x': x, 'y': y} for i, (x, y) in enumerate(nodes)}
+
+    def draws():
+        while True:
+            yield from map(tuple, block().tolist())
+
+    def valid(u, grid):
+        i, j = int(u[0] // r), int(u[1] // r)
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                for v in grid.get((i + di, j + dj), ()):
+                    if math.dist(u, v) < r:
+                        return False
+        return True
+
+    # An unlucky arrangement of early points can leave no room for the rest, so start over
+    # after a long run of rejections.
+    points = draws()
+    for _ in range(__PLACEMENT_RESTARTS):
+        nodes = []
+        grid = {}
+        rejections = 0
+        while len(nodes) < n and rejections < __PLACEMENT_REJECTIONS:
+            m = next(points)
+            if valid(m, grid):
+                nodes.append(m)
+                grid.setdefault((int(m[0] // r), int(m[1] // r)), []).append(m)
+                rejections = 0
+            else:
+                rejections += 1
+        if len(nodes) == n:
+            return {i: {'x': m[0], 'y': m[1]} for i, m in enumerate(nodes)}
+    raise ValueError(f'Could not place {n} nodes at least {r:.3g} apart in a {width:g}x{height:g} space')
+
+
+def __candidate_edges(xy: np.ndarray):
+    """Lazily yields every pair of nodes, in order of increasing distance between them.
+
+    Pairs at equal distances are yielded in the same order as `nx.complete_graph(n).edges`.
+    Rather than sorting all pairs up front, the pairs are sorted in batches of increasing size,
+    so only the batches that are actually consumed need to be sorted.
+    """
+    n = len(xy)
+    if n < 2:
+        return
 
+    # Squared distances between all pairs (u, v) with u < v, in row-major order.
+    starts = np.zeros(n, dtype=np.int64)
+    starts[1:] = np.cumsum(np.arange(n - 1, 0, -1))
+    dist = np.empty(n * (n - 1) // 2)
+    for u in range(n - 1):
+        dist[starts[u]:starts[u] + n - 1 - u] = ((xy[u + 1:] - xy[u]) ** 2).sum(axis=1)
 
-def random_planar_graph(n: int, connected=True, s=0.3) -> nx.Graph:
+    lower = -np.inf
+    size = 4 * n
+    remaining = dist
+    while len(remaining) > 0:
+        if size < len(remaining):
+            upper = np.partition(remaining, size - 1)[size - 1]
+        else:
+            upper = np.inf
+        batch = np.flatnonzero((dist > lower) & (dist <= upper))
+        batch = batch[np.argsort(dist[batch], kind='stable')]
+        us = np.searchsorted(starts, batch, side='right') - 1
+        vs = batch - starts[us] + us + 1
+        yield from zip(us.tolist(), vs.tolist())
+        lower = upper
+        size *= 2
+        remaining = dist[dist > lower]
+
+
+def __delaunay_edges(xy: np.ndarray) -> list[tuple[int, int]]:
+    """Returns the edges of a Delaunay triangulation of the points, in order of increasing length."""
+    n = len(xy)
+    if n < 2:
+        return []
+    index = {p: i for i, p in enumerate(map(tuple, xy.tolist()))}
+    ends = get_coordinates(delaunay_triangles(MultiPoint(xy), only_edges=True)).reshape(-1, 2, 2)
+    edges = [tuple(sorted((index[tuple(a)], index[tuple(b)]))) for a, b in ends.tolist()]
+    if not edges:
+        # The points are collinear, so the triangulation is the path along the line.
+        order = np.lexsort((xy[:, 1], xy[:, 0])).tolist()
+        edges = [tuple(sorted(e)) for e in zip(order, order[1:])]
+    edges.sort()
+    lengths = [math.dist(xy[u], xy[v]) for u, v in edges]
+    return [edges[i] for i in sorted(range(len(edges)), key=lengths.__getitem__)]
+
+
+def __max_planar_edges(xy: np.ndarray) -> int:
+    """Returns the number of edges in any triangulation of the points (the most a straight-line planar graph can have)."""
+    n = len(xy)
+    if n < 3:
+        return n * (n - 1) // 2
+    hull = MultiPoint(xy).convex_hull
+    if hull.geom_type != 'Polygon':
+        # The points are collinear.
+        return n - 1
+    return 3 * n - 3 - (len(hull.exterior.coords) - 1)
+
+
+def random_planar_graph(n: int, connected=True, s=0.3, components=None, seed=None, compact=False,
+                        method='greedy', m=None, canvas=None, integral=True) -> nx.Graph | CompactGraph:
     """Generate a random planar graph.
 
     Parameters
@@ -44,9 +427,41 @@ def random_planar_graph(n: int, connected=True, s=0.3) -> nx.Graph:
     s : float
         A sparseness parameter between 0 (no edges) and 1 (many edges).
 
+    components : None | int
+        If set, the graph may stop growing once it has at most this many connected components.
+        This overrides `connected`.
+
+    seed : None | int | numpy Generator
+        Seeds the random number generator, or gives the generator to draw from.
+        Equal seeds always produce identical graphs.
+
+    compact : bool
+        If `True`, return a `CompactGraph` instead of a networkx Graph.
+
+    method : str
+        `"greedy"` [default] | `"delaunay"`
+
+        The greedy method considers every pair of nodes, adding the shortest edges first.
+        Unless `m` is set, it considers at least the shortest `s * n * (n - 1) / 2` pairs,
+        so its running time grows quadratically with n (a few seconds for 2000 nodes).
+        The Delaunay method triangulates the nodes in O(n log n) time and then removes edges,
+        which is much faster for large graphs.
+
+    m : None | int | (int, int)
+        If set, the graph has exactly `m` edges, or between `m[0]` and `m[1]` edges (inclusive).
+        This overrides `s`.
+
+    canvas : None | str | (float, float)
+        The width and height of the coordinate space that the nodes are placed in (100 by 100 by default).
+        `"scaled"` grows both sides with the square root of n once there are more than 100 nodes,
+        so that the nodes are as densely packed as 100 nodes on the default canvas.
+
+    integral : bool
+        If `True` [default], the nodes have integer coordinates. Otherwise, they have float coordinates.
+
     Returns
     -------
-    G : networkx Graph
+    G : networkx Graph | CompactGraph
         A random planar graph.
 
     Notes
@@ -55,67 +470,811 @@ def random_planar_graph(n: int, connected=True, s=0.3) -> nx.Graph:
     Higher values encourage more edges to be added.
     A value of `1.0` will aim to add as many edges as possible.
     As n increases, so must sparseness.
+
+    With the Delaunay method, `s` is the proportion of the triangulation's edges that are kept
+    on top of a spanning tree (or forest, if the graph need not be connected),
+    and isolated nodes are kept in the graph.
+
+    When `m` is set, isolated nodes are always kept in the graph, and edges are only added while
+    enough of the budget remains to join up the components.
+    A `ValueError` is raised if the target cannot be met with the chosen node positions.
     """
     assert n >= 0
     assert 0.0 <= s <= 1.0
+    assert components is None or components >= 1
+    assert method in ['greedy', 'delaunay']
+    assert canvas is None or canvas == 'scaled' or len(canvas) == 2
+
+    if components is None:
+        components = 1 if connected else max(n, 1)
+
+    if m is not None:
+        # Any integer type (e.g. a numpy integer) is accepted, and converted to a plain int.
+        lo, hi = (operator.index(m),) * 2 if isinstance(m, numbers.Integral) else map(operator.index, m)
+        if not 0 <= lo <= hi or hi < n - components:
+            raise ValueError(f'Cannot generate a graph with {n} nodes, {m} edges and {components} component(s)')
 
     # Set the coordinates of the nodes.
-    positions = __random_positions(n)
-    cg = nx.complete_graph(n)
-    nx.set_node_attributes(cg, positions)
+    if canvas is None:
+        width, height = __WIDTH, __HEIGHT
+    elif canvas == 'scaled':
+        scale = math.sqrt(max(n, __CANVAS_NODES) / __CANVAS_NODES)
+        width, height = __WIDTH * scale, __HEIGHT * scale
+    else:
+        width, height = canvas
+    positions = __random_positions(n, np.random.default_rng(seed), width, height, integral)
 
     def coord(v):
-        return cg.nodes[v]['x'], cg.nodes[v]['y']
+        return positions[v]['x'], positions[v]['y']
+
+    xy = np.array([coord(v) for v in range(n)], dtype=float).reshape(n, 2)
+
+    if m is not None and lo > __max_planar_edges(xy):
+        raise ValueError(f'Cannot fit {lo} edges into a planar graph with these {n} node positions')
 
-    def dist(e):
-        return math.dist(coord(e[0]), coord(e[1]))
+    # Construct the final graph, recording which nodes have been reached in the order they were reached.
+    result = []
+    reached = {}
 
-    # Sort the edges according to the distance between their endpoints.
-    edges = sorted(cg.edges(), key=dist)
+    # The connected components of the final graph, updated as edges are accepted.
+    dsu = _DisjointSet(n)
 
-    # Construct the final graph.
-    result = nx.Graph()
+    # Accepted edges, which candidate edges are tested for crossings against.
+    segments = _SegmentSet()
+    num_edges = n * (n - 1) // 2
 
     def coords(e):
         return [coord(e[0]), coord(e[1])]
 
-    def keeps_planarity(new_edge):
-        for e in result.edges:
-            if e[0] in new_edge or e[1] in new_edge:
-                continue
-            l0 = LineString(coords(e))
-            l1 = LineString(coords(new_edge))
-            if l0.intersects(l1):
-                return False
-        return True
+    def keeps_planarity(new_edge, since=0):
+        return not segments.crosses(new_edge, *coords(new_edge), since)
+
+    def grown(i):
+        # Whether the graph stops growing after the candidate edge with index i (unless a number of edges is set).
+        return m is None and len(reached) == n and i > s * num_edges and dsu.components <= components
 
-    def vector(v0, v1):
-        v = np.array(v1) - np.array(v0)
-        return v / np.linalg.norm(v)
+    def screened(candidates):
+        """Yields the index of each candidate edge that crosses no edge accepted before its batch was screened,
+        with the edge and the number of edges accepted by then. The batches grow in size."""
+        size = __BATCH_SIZE
+        offset = 0
+        while batch := list(itertools.islice(candidates, size)):
+            ends = np.array(batch, dtype=np.intp)
+            crossing = segments.crossing(ends, xy[ends[:, 0]], xy[ends[:, 1]])
+            since = segments.count
+            for i in np.flatnonzero(~crossing).tolist():
+                yield offset + i, batch[i], since
+            offset += len(batch)
+            if grown(offset - 1):
+                return
+            size = min(2 * size, __MAX_BATCH_SIZE)
+
+    # The directions of the accepted edges around each node.
+    rotations = _AngularIndex()
 
     def large_angle(v0, v1):
-        if v0 not in result:
-            return True
-        for v in nx.neighbors(result, v0):
-            vec_0 = vector(coord(v0), coord(v))
-            vec_1 = vector(coord(v0), coord(v1))
-            angle = np.arccos(np.clip(np.dot(vec_0, vec_1), -1.0, 1.0))
-            if angle <= __ANGLE_TOLERANCE:
-                return False
-        return True
+        return rotations.admits(v0, coord(v0), coord(v1), __ANGLE_TOLERANCE)
 
     def large_angles(new_edge):
         v0, v1 = new_edge
         return large_angle(v0, v1) and large_angle(v1, v0)
 
-    for i, edge in enumerate(edges):
-        if keeps_planarity(edge) and large_angles(edge):
-            result.add_edge(edge[0], edge[1])
-        if result.number_of_nodes() == n and \
-                i > s * len(edges) and \
-                (not connected or nx.is_connected(result)):
+    def affordable(edge):
+        # Only add an edge if enough of the edge budget remains to join up the components afterwards.
+        if m is None:
+            return True
+        merging = dsu.find(edge[0]) != dsu.find(edge[1])
+        return len(result) + 1 + max(dsu.components - components - merging, 0) <= hi
+
+    def complete():
+        return lo <= len(result) and dsu.components <= components
+
+    def accept(edge):
+        result.append(edge)
+        reached.setdefault(edge[0], len(reached))
+        reached.setdefault(edge[1], len(reached))
+        rotations.add(*edge, *coords(edge))
+        dsu.union(*edge)
+
+    if method == 'delaunay':
+        # Every node is kept, even if it ends up isolated.
+        reached = {v: v for v in range(n)}
+        # The triangulation is planar, and it contains the minimum spanning tree,
+        # whose edges are always at least 60 degrees apart.
+        triangulation = __delaunay_edges(xy)
+        rest = []
+        for edge in triangulation:
+            if dsu.components > components and dsu.find(edge[0]) != dsu.find(edge[1]) and \
+                    affordable(edge) and large_angles(edge):
+                accept(edge)
+            else:
+                rest.append(edge)
+        extra = round(s * len(rest)) if m is None else max(lo - len(result), 0)
+        for edge in rest:
+            if extra == 0:
+                break
+            if large_angles(edge):
+                accept(edge)
+                extra -= 1
+    else:
+        # Consider the edges in order of the distance between their endpoints.
+        # Accepted edges are never removed, so an edge that crosses one can be rejected for good:
+        # the candidates are screened against the accepted edges a batch at a time, and the rest then only
+        # need testing one by one against the edges accepted since their batch was screened.
+        previous = -1
+        for i, edge, since in screened(__candidate_edges(xy)):
+            # The skipped candidates can't change the graph, but the search would have stopped at one of them.
+            if i > previous + 1 and grown(i - 1):
+                break
+            previous = i
+            if affordable(edge) and keeps_planarity(edge, since) and large_angles(edge):
+                accept(edge)
+                segments.add(edge, *coords(edge))
+            if complete() or len(result) == hi if m is not None else grown(i):
+                break
+
+    if m is not None:
+        if not complete():
+            raise ValueError(f'Could not generate a planar graph with {n} nodes, {m} edges and '
+                             f'{components} component(s) from these node positions')
+        for v in range(n):
+            reached.setdefault(v, len(reached))
+
+    if compact:
+        nodes = list(reached)
+        return CompactGraph.from_edges(nodes, [(reached[u], reached[v]) for u, v in result],
+                                       [coord(v) for v in nodes])
+
+    G = nx.Graph()
+    G.add_nodes_from((v, positions[v]) for v in reached)
+    G.add_edges_from(result)
+    return G
+
+
+def __batch_task(task):
+    """Generates one graph for `batch()` from its own random stream."""
+    generator, stream, kwargs = task
+    return generator(seed=stream, **kwargs)
+
+
+def batch(generator, count: int, seed=None, processes=None, chunksize=1, ordered=False, **kwargs):
+    """Generate many random graphs in parallel.
+
+    The graphs are generated by a pool of worker processes and yielded as soon as they are ready.
+
+    Parameters
+    ----------
+    generator : function
+        The generator to call for each graph, e.g. `random_tree`.
+        It must be defined at the top level of a module and take a `seed` argument.
+
+    count : int
+        The number of graphs.
+
+    seed : None | int | numpy Generator
+        Seeds the random number generators. Each graph gets its own independent stream derived from
+        `seed`, so the same seed always produces the same graphs, regardless of the number of processes.
+
+    processes : None | int
+        The number of worker processes. Defaults to the number of CPUs.
+        If `1`, the graphs are generated in the current process.
+
+    chunksize : int
+        The number of graphs handed to a worker process at a time.
+
+    ordered : bool
+        If `True`, the graphs are yielded in order of their random streams.
+        Otherwise, they are yielded in the order they are finished.
+
+    **kwargs
+        Passed to `generator` for every graph.
+
+    Yields
+    ------
+    G : any
+        A graph returned by `generator`.
+    """
+    assert count >= 0
+    if isinstance(seed, np.random.Generator):
+        seed = int(seed.integers(2 ** 63))
+    tasks = ((generator, stream, kwargs) for stream in np.random.SeedSequence(seed).spawn(count))
+
+    if processes == 1:
+        yield from map(__batch_task, tasks)
+        return
+
+    with multiprocessing.Pool(processes) as pool:
+        if ordered:
+            yield from pool.imap(__batch_task, tasks, chunksize)
+        else:
+            yield from pool.imap_unordered(__batch_task, tasks, chunksize)
+
+
+def random_planar_graphs(count: int, n: int, connected=True, s=0.3, components=None,
+                         seed=None, compact=False, method='greedy', m=None, canvas=None, integral=True,
+                         processes=None, chunksize=1, ordered=False):
+    """Generate many random planar graphs in parallel.
+
+    This is shorthand for `batch(random_planar_graph, count, ...)`.
+
+    Parameters
+    ----------
+    count : int
+        The number of graphs.
+
+    n, connected, s, components, compact, method, m, canvas, integral
+        Passed to `random_planar_graph()` for every graph.
+
+    seed, processes, chunksize, ordered
+        See `batch()`.
+
+    Yields
+    ------
+    G : networkx Graph | CompactGraph
+        A random planar graph.
+    """
+    return batch(random_planar_graph, count, seed=seed, processes=processes, chunksize=chunksize,
+                 ordered=ordered, n=n, connected=connected, s=s, components=components, compact=compact,
+                 method=method, m=m, canvas=canvas, integral=integral)
+
+
+def __prufer_edges(sequence: list[int], n: int) -> list[tuple[int, int]]:
+    """Decodes a Prüfer sequence into the edges of a tree on `n` nodes, in linear time."""
+    if n < 2:
+        return []
+    degree = [1] * n
+    for v in sequence:
+        degree[v] += 1
+    ptr = degree.index(1)
+    leaf = ptr
+    edges = []
+    for v in sequence:
+        edges.append((leaf, v))
+        degree[v] -= 1
+        if degree[v] == 1 and v < ptr:
+            leaf = v
+        else:
+            ptr = degree.index(1, ptr + 1)
+            leaf = ptr
+    edges.append((leaf, n - 1))
+    return edges
+
+
+def __spread(count: int, length: float) -> np.ndarray:
+    """Returns `count` evenly spaced coordinates across `[0, length]` (or the midpoint, for a single one)."""
+    if count == 1:
+        return np.array([length / 2])
+    return np.linspace(0, length, count)
+
+
+def random_tree(n: int, root=0, seed=None) -> nx.Graph:
+    """Generate a uniformly random labelled tree.
+
+    The tree is decoded from a random Prüfer sequence in O(n) time.
+    The nodes are laid out in levels by their distance from the root,
+    which is placed at the top (i.e. with the smallest `y` coordinate).
+
+    Parameters
+    ----------
+    n : int
+        The number of nodes.
+
+    root : int
+        The node used as the root for the layout.
+
+    seed : None | int | numpy Generator
+        Seeds the random number generator, or gives the generator to draw from.
+
+    Returns
+    -------
+    G : networkx Graph
+        A random tree whose nodes have `x` and `y` attributes.
+    """
+    assert n >= 0
+    rng = np.random.default_rng(seed)
+    G = nx.Graph()
+    G.add_nodes_from(range(n))
+    G.add_edges_from(__prufer_edges(rng.integers(0, n, max(n - 2, 0)).tolist(), n))
+    if n == 0:
+        return G
+
+    levels = [[root]]
+    seen = {root}
+    while True:
+        level = [w for v in levels[-1] for w in G[v] if w not in seen]
+        if not level:
             break
+        seen.update(level)
+        levels.append(level)
+    ys = __spread(len(levels), __HEIGHT)
+    for y, level in zip(ys.tolist(), levels):
+        for v, x in zip(level, __spread(len(level), __WIDTH).tolist()):
+            G.nodes[v]['x'] = x
+            G.nodes[v]['y'] = y
+    return G
+
+
+def random_bipartite_graph(n0: int, n1: int, p=0.3, seed=None) -> nx.Graph:
+    """Generate a random bipartite graph.
+
+    Each of the `n0 * n1` possible edges is included with probability `p`.
+    The edges are sampled directly, in time proportional to the number of edges.
+
+    Parameters
+    ----------
+    n0 : int
+        The number of nodes in the first set, labelled `0` to `n0 - 1`.
+
+    n1 : int
+        The number of nodes in the second set, labelled `n0` to `n0 + n1 - 1`.
+
+    p : float
+        The probability of each edge.
+
+    seed : None | int | numpy Generator
+        Seeds the random number generator, or gives the generator to draw from.
+
+    Returns
+    -------
+    G : networkx Graph
+        A random bipartite graph. Each node has a `bipartite` attribute of `0` or `1`,
+        and the two sets are placed in columns on the left and right via the `x` and `y` attributes.
+    """
+    assert n0 >= 0 and n1 >= 0
+    assert 0.0 <= p <= 1.0
+    rng = np.random.default_rng(seed)
+    G = nx.Graph()
+    for side, (offset, count) in enumerate([(0, n0), (n0, n1)]):
+        ys = __spread(count, __HEIGHT).tolist()
+        G.add_nodes_from((offset + i, {'bipartite': side, 'x': side * __WIDTH, 'y': y}) for i, y in enumerate(ys))
+    k = rng.binomial(n0 * n1, p)
+    chosen = np.sort(rng.choice(n0 * n1, size=k, replace=False))
+    G.add_edges_from(zip((chosen // max(n1, 1)).tolist(), (n0 + chosen % max(n1, 1)).tolist()))
+    return G
+
+
+def random_planar_dag(n: int, s=0.3, seed=None, method='delaunay', m=None) -> nx.DiGraph:
+    """Generate a random planar directed acyclic graph.
+
+    A random planar graph is generated, and then each edge is directed from left to right
+    (i.e. by increasing `x` coordinate, then `y` coordinate), so that the drawing flows across the page.
+
+    Parameters
+    ----------
+    n : int
+        The number of nodes.
+
+    s, method, m
+        Passed to `random_planar_graph()`.
+
+    seed : None | int | numpy Generator
+        Seeds the random number generator, or gives the generator to draw from.
+
+    Returns
+    -------
+    G : networkx DiGraph
+        A random planar DAG whose nodes have `x` and `y` attributes.
+    """
+    U = random_planar_graph(n, s=s, seed=seed, method=method, m=m)
+    G = nx.DiGraph()
+    G.add_nodes_from(U.nodes(data=True))
+
+    def key(v):
+        return U.nodes[v]['x'], U.nodes[v]['y'], v
+
+    G.add_edges_from((u, v) if key(u) < key(v) else (v, u) for u, v in U.edges)
+    return G
+
+
+def random_grid_graph(rows: int, columns: int, p=0.5, connected=True, seed=None) -> nx.Graph:
+    """Generate a random subgraph of a grid.
+
+    Parameters
+    ----------
+    rows : int
+        The number of rows in the grid.
+
+    columns : int
+        The number of columns in the grid.
+
+    p : float
+        The probability of keeping each grid edge (that is not needed for connectivity).
+
+    connected : bool
+        If `True`, a random spanning tree of the grid is always kept, so the graph is connected.
+
+    seed : None | int | numpy Generator
+        Seeds the random number generator, or gives the generator to draw from.
+
+    Returns
+    -------
+    G : networkx Graph
+        A random grid subgraph. The node in row `r` and column `c` is labelled `r * columns + c`,
+        and placed in the grid via its `x` and `y` attributes.
+    """
+    assert rows >= 0 and columns >= 0
+    assert 0.0 <= p <= 1.0
+    rng = np.random.default_rng(seed)
+    n = rows * columns
+    ids = np.arange(n).reshape(rows, columns)
+    edges = np.concatenate([np.stack([ids[:, :-1].ravel(), ids[:, 1:].ravel()], axis=1),
+                            np.stack([ids[:-1, :].ravel(), ids[1:, :].ravel()], axis=1)]).reshape(-1, 2)
+
+    keep = rng.random(len(edges)) < p
+    if connected:
+        # Kruskal's algorithm with random weights gives a random spanning tree.
+        dsu = _DisjointSet(n)
+        for i in rng.permutation(len(edges)).tolist():
+            u, v = edges[i].tolist()
+            if dsu.find(u) != dsu.find(v):
+                dsu.union(u, v)
+                keep[i] = True
+
+    G = nx.Graph()
+    xs, ys = __spread(columns, __WIDTH).tolist(), __spread(rows, __HEIGHT).tolist()
+    G.add_nodes_from((r * columns + c, {'x': x, 'y': y}) for r, y in enumerate(ys) for c, x in enumerate(xs))
+    G.add_edges_from(edges[keep].tolist())
+    return G
+
+
+def rotation_system(G: nx.Graph) -> dict:
+    """Find the order of the edges around each node in a straight-line drawing of a graph.
+
+    Parameters
+    ----------
+    G : networkx Graph
+        A graph whose nodes have `x` and `y` attributes (e.g. from `random_planar_graph()`).
+
+    Returns
+    -------
+    rotations : dict
+        A dictionary mapping each node to a list of its neighbours, in anticlockwise order.
+    """
+    rotations = _AngularIndex()
+    for u, v in G.edges:
+        if u != v:
+            rotations.add(u, v, (G.nodes[u]['x'], G.nodes[u]['y']), (G.nodes[v]['x'], G.nodes[v]['y']))
+    return {v: rotations.rotation(v) for v in G.nodes}
+
+
+def __fruchterman_reingold(edges: np.ndarray, n: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    """Computes a Fruchterman-Reingold layout of a graph on nodes `0..n-1` within the coordinate space.
+
+    Repulsion is approximated in the style of Barnes-Hut, using a hierarchy of grids that halve
+    in cell size at each level. Nodes in neighbouring cells of the finest grid repel each other directly.
+    Every other node is accounted for exactly once, via the centre of mass of the coarsest cell
+    that is well separated from the node (i.e. not adjacent to its cell at that level).
+    Each iteration therefore takes O(n log n) time rather than O(n²).
+
+    The nodes aren't confined to the coordinate space while the layout runs (which would pile them up against
+    its edges), but a weak gravity pulls them towards their centre, so that separate components stay close.
+    The grids cover the nodes' current bounding box, and the finished layout is scaled to fit the coordinate space.
+    """
+    size = np.array([__WIDTH, __HEIGHT], dtype=float)
+    xy = rng.uniform(0, 1, size=(n, 2)) * size
+    if n < 2:
+        return np.full((n, 2), size / 2)
+
+    k = math.sqrt(__WIDTH * __HEIGHT / n)
+    depth = max(1, math.ceil(math.log2(math.sqrt(n))))
+    temperature = __WIDTH / 10
+    cooling = temperature / (iterations + 1)
+    u, v = edges[:, 0], edges[:, 1]
+    nodes = np.arange(n)
+    offsets = np.array([(dx, dy) for dx in range(-2, 4) for dy in range(-2, 4)])
+
+    def repel(displacement, delta, mass, sources):
+        dist = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 0.01)
+        force = mass * k * k / (dist * dist)
+        for axis in (0, 1):
+            displacement[:, axis] += np.bincount(sources, delta[:, axis] * force, minlength=n)
+
+    for _ in range(iterations):
+        displacement = np.zeros((n, 2))
+        low = xy.min(axis=0)
+        span = np.maximum(xy.max(axis=0) - low, 1e-9)
+
+        for level in range(1, depth + 1):
+            cells = 2 ** level
+            cell = np.minimum(((xy - low) / span * cells).astype(np.intp), cells - 1)
+            ids = cell[:, 0] * cells + cell[:, 1]
+            mass = np.bincount(ids, minlength=cells * cells).astype(float)
+            centre = np.stack([np.bincount(ids, xy[:, axis], minlength=cells * cells) for axis in (0, 1)], axis=1)
+            centre /= np.maximum(mass, 1)[:, None]
+
+            # The children of the cells adjacent to each node's parent cell, which are not adjacent to its own cell.
+            cx = (cell[:, 0] // 2 * 2)[:, None] + offsets[:, 0]
+            cy = (cell[:, 1] // 2 * 2)[:, None] + offsets[:, 1]
+            far = (0 <= cx) & (cx < cells) & (0 <= cy) & (cy < cells) & \
+                ((np.abs(cx - cell[:, 0:1]) > 1) | (np.abs(cy - cell[:, 1:2]) > 1))
+            sources, others = np.nonzero(far)
+            others = cx[sources, others] * cells + cy[sources, others]
+            repel(displacement, xy[sources] - centre[others], mass[others], sources)
+
+        # Nodes in the same or adjacent cells of the finest grid repel each other directly.
+        order = np.argsort(ids, kind='stable')
+        sorted_ids = ids[order]
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                cx, cy = cell[:, 0] + dx, cell[:, 1] + dy
+                valid = (0 <= cx) & (cx < cells) & (0 <= cy) & (cy < cells)
+                neighbour = cx * cells + cy
+                start = np.searchsorted(sorted_ids, neighbour, side='left')
+                counts = np.where(valid, np.searchsorted(sorted_ids, neighbour, side='right') - start, 0)
+                within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                a = np.repeat(nodes, counts)
+                b = order[np.repeat(start, counts) + within]
+                keep = a != b
+                repel(displacement, xy[a[keep]] - xy[b[keep]], 1.0, a[keep])
+
+        # Attraction along the edges.
+        delta = xy[u] - xy[v]
+        dist = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 0.01)
+        force = dist / k
+        for axis in (0, 1):
+            pull = delta[:, axis] * force
+            displacement[:, axis] -= np.bincount(u, pull, minlength=n)
+            displacement[:, axis] += np.bincount(v, pull, minlength=n)
+
+        # Gravity towards the centre of the nodes.
+        displacement -= xy - xy.mean(axis=0)
+
+        # Move each node by at most the current temperature.
+        length = np.maximum(np.hypot(displacement[:, 0], displacement[:, 1]), 0.01)
+        xy += displacement / length[:, None] * np.minimum(length, temperature)[:, None]
+        temperature -= cooling
+
+    # Scale the layout to fill the coordinate space.
+    low, high = xy.min(axis=0), xy.max(axis=0)
+    span = np.where(high > low, high - low, 1.0)
+    return (xy - low) / span * size
+
+
+# Layouts already computed by force_directed_layout(), for each graph still in use
+__layouts = weakref.WeakKeyDictionary()
+
+
+def force_directed_layout(G: nx.Graph, iterations=50, seed=None) -> nx.Graph:
+    """Compute a force-directed layout for a graph and store it in the `x` and `y` node attributes.
+
+    This lets the layout be computed once on the server, so that the graph can be drawn
+    with fixed coordinates, just like the graphs from `random_planar_graph()`.
+    It uses a vectorised Fruchterman-Reingold algorithm with a Barnes-Hut style approximation
+    of the repulsion between distant nodes, so it scales to graphs with thousands of nodes.
+
+    If a seed is given, the layout is cached with the graph, so calling this again on an unchanged graph
+    with the same arguments reuses it. Without a seed, each call computes a new random layout.
+
+    Parameters
+    ----------
+    G : networkx Graph
+        The graph to lay out. Its nodes' `x` and `y` attributes are overwritten.
+
+    iterations : int
+        The number of iterations of the algorithm.
+
+    seed : None | int
+        Seeds the initial positions of the nodes. Only seeded layouts are cached.
+
+    Returns
+    -------
+    G : networkx Graph
+        The same graph, for convenience.
+    """
+    nodes = list(G.nodes)
+    index = {v: i for i, v in enumerate(nodes)}
+    edges = np.array([(index[u], index[v]) for u, v in G.edges() if u != v], dtype=np.intp).reshape(-1, 2)
+    key = (tuple(nodes), edges.tobytes(), iterations, seed)
+
+    cached = __layouts.get(G)
+    if cached is not None and cached[0] == key:
+        xy = cached[1]
+    else:
+        xy = __fruchterman_reingold(edges, len(nodes), iterations, np.random.default_rng(seed))
+        if seed is not None:
+            __layouts[G] = (key, xy)
+
+    for v, (x, y) in zip(nodes, xy.tolist()):
+        G.nodes[v]['x'] = x
+        G.nodes[v]['y'] = y
+    return G
+
+
+class GraphPool:
+    """A persistent pool of pre-generated random planar graphs, stored on disk.
+
+    The graphs are grouped by the parameters they were generated with.
+    Each group is stored as a set of packed arrays (`.npy` files) with an offset table,
+    which are memory-mapped for reading. Fetching a graph is therefore a constant-time slice,
+    with nothing to parse, and the pages are shared between all the processes that use the pool.
+
+    A group is refilled by writing a whole new set of arrays and then atomically switching
+    a pointer file over to them, so readers (in any process) never see a partially written group.
+
+    Parameters
+    ----------
+    directory : str
+        Where the pool is stored. It is created if it does not exist.
+
+    capacity : int
+        The number of graphs generated for each group when it is refilled.
+
+    max_bytes : None | int
+        If set, the groups that were least recently refilled are deleted
+        whenever the pool grows larger than this.
+
+    processes : None | int
+        The number of worker processes used to refill a group (see `random_planar_graphs()`).
+    """
+    __ARRAYS = ('nodes', 'xy', 'indptr', 'indices', 'offsets')
+
+    def __init__(self, directory: str, capacity=1000, max_bytes=None, processes=None):
+        self.directory = directory
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.processes = processes
+        self.__groups = {}
+        self.__refills = {}
+        self.__lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def __key(n, connected, s, method) -> str:
+        return f'n{n}-{"connected" if connected else "any"}-s{float(s)!r}-{method}'
+
+    def __open(self, key):
+        """Returns the memory-mapped arrays of the current generation of a group, or `None` if it is empty."""
+        missing = None
+        while True:
+            try:
+                with open(os.path.join(self.directory, key, 'CURRENT')) as f:
+                    generation = f.read().strip()
+            except FileNotFoundError:
+                return None
+            with self.__lock:
+                cached = self.__groups.get(key)
+                if cached is not None and cached[0] == generation:
+                    return cached[1]
+            path = os.path.join(self.directory, key, generation)
+            try:
+                arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in self.__ARRAYS}
+            except FileNotFoundError:
+                # A refill (possibly in another process) replaced and deleted this generation
+                # after CURRENT was read, so read it again, unless it still names the missing generation.
+                if generation == missing:
+                    raise
+                missing = generation
+                continue
+            with self.__lock:
+                self.__groups[key] = (generation, arrays)
+            return arrays
+
+    def __len__(self):
+        return sum(1 for entry in os.scandir(self.directory)
+                   if os.path.exists(os.path.join(entry.path, 'CURRENT')))
+
+    def count(self, n: int, connected=True, s=0.3, method='greedy') -> int:
+        """Returns the number of graphs currently stored for the given parameters."""
+        arrays = self.__open(self.__key(n, connected, s, method))
+        return 0 if arrays is None else len(arrays['offsets']) - 1
+
+    def get(self, n: int, connected=True, s=0.3, method='greedy', seed=None, compact=False):
+        """Fetch a random graph with the given parameters from the pool.
+
+        If the pool holds no graphs for these parameters, one is generated directly
+        and the group is refilled in the background.
+
+        Parameters
+        ----------
+        n, connected, s, method
+            The parameters passed to `random_planar_graph()`.
+
+        seed : None | int | numpy Generator
+            Seeds the choice of graph.
+
+        compact : bool
+            If `True`, return a `CompactGraph` instead of a networkx Graph.
+
+        Returns
+        -------
+        G : networkx Graph | CompactGraph
+            A random planar graph.
+        """
+        rng = np.random.default_rng(seed)
+        arrays = self.__open(self.__key(n, connected, s, method))
+        if arrays is None:
+            self.refill(n, connected, s, method, background=True)
+            return random_planar_graph(n, connected=connected, s=s, seed=rng, compact=compact, method=method)
+
+        offsets = arrays['offsets']
+        i = int(rng.integers(len(offsets) - 1))
+        (a, c), (b, d) = offsets[i], offsets[i + 1]
+        G = CompactGraph(arrays['nodes'][a:b], arrays['indptr'][a + i:b + i + 1],
+                         arrays['indices'][c:d], arrays['xy'][a:b])
+        return G if compact else G.to_networkx()
+
+    def refill(self, n: int, connected=True, s=0.3, method='greedy', seed=None, background=False):
+        """Replace the graphs stored for the given parameters with `capacity` new ones.
+
+        Parameters
+        ----------
+        n, connected, s, method
+            The parameters passed to `random_planar_graph()`.
+
+        seed : None | int
+            Seeds the generated graphs.
+
+        background : bool
+            If `True`, refill on a background thread and return it immediately.
+            At most one background refill runs per group at a time.
+
+        Returns
+        -------
+        thread : None | threading.Thread
+            The background thread, if there is one.
+        """
+        key = self.__key(n, connected, s, method)
+        if not background:
+            self.__refill(key, n, connected, s, method, seed)
+            return None
+
+        with self.__lock:
+            thread = self.__refills.get(key)
+            if thread is not None and thread.is_alive():
+                return thread
+            thread = threading.Thread(target=self.__refill, args=(key, n, connected, s, method, seed), daemon=True)
+            self.__refills[key] = thread
+        thread.start()
+        return thread
+
+    def __refill(self, key, n, connected, s, method, seed):
+        graphs = list(random_planar_graphs(self.capacity, n, connected=connected, s=s, seed=seed, compact=True,
+                                           method=method, processes=self.processes, ordered=True))
+        node_offsets = np.cumsum([0] + [G.number_of_nodes() for G in graphs])
+        index_offsets = np.cumsum([0] + [len(G.indices) for G in graphs])
+        arrays = {
+            'nodes': np.concatenate([G.nodes for G in graphs] or [np.empty(0, np.int32)]),
+            'xy': np.concatenate([G.xy for G in graphs] or [np.empty((0, 2), np.int64)]),
+            'indptr': np.concatenate([G.indptr for G in graphs] or [np.empty(0, np.int32)]),
+            'indices': np.concatenate([G.indices for G in graphs] or [np.empty(0, np.int32)]),
+            'offsets': np.stack([node_offsets, index_offsets], axis=1).astype(np.int64),
+        }
+
+        # Write the new generation out of sight, then publish it by atomically replacing the pointer.
+        group = os.path.join(self.directory, key)
+        os.makedirs(group, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=group)
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f'{name}.npy'), array)
+        generation = f'gen-{time.time_ns()}-{os.path.basename(staging)[len(".staging-"):]}'
+        os.rename(staging, os.path.join(group, generation))
+        fd, pointer = tempfile.mkstemp(prefix='.CURRENT-', dir=group)
+        with os.fdopen(fd, 'w') as f:
+            f.write(generation)
+        os.replace(pointer, os.path.join(group, 'CURRENT'))
+
+        # Readers that still have an old generation mapped can keep using it (on POSIX systems).
+        for entry in os.scandir(group):
+            if entry.is_dir() and entry.name.startswith('gen-') and entry.name != generation:
+                shutil.rmtree(entry.path, ignore_errors=True)
+        self.__evict(key)
 
-    new_positions = {p: v for p, v in positions.items() if p in result.nodes}
-    nx.set_node_attributes(result, new_positions)
-    return result
+    def __evict(self, keep):
+        """Deletes the least recently refilled groups (other than `keep`) until the pool fits within `max_bytes`."""
+        if self.max_bytes is None:
+            return
+        groups = []
+        for entry in os.scandir(self.directory):
+            pointer = os.path.join(entry.path, 'CURRENT')
+            if entry.is_dir() and os.path.exists(pointer):
+                size = 0
+                for root, _, files in os.walk(entry.path):
+                    size += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+                groups.append((os.stat(pointer).st_mtime_ns, size, entry.name))
+        total = sum(size for _, size, _ in groups)
+        for _, size, name in sorted(groups):
+            if total <= self.max_bytes:
+                break
+            if name != keep:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+                total -= size
@@ -0,0 +1,623 @@
+"""A reference implementation of the question lifecycle described in the usage documentation.
+
+Rather than deep copying the graphs before passing them to each method, the graphs are frozen once
+after `generate_data()` is called, and each method is given a cheap copy-on-write view of them.
+A view shares the frozen graph's storage until it is modified, either by one of its modifying methods
+(e.g. `add_edge()`) or by changing an attribute (e.g. `G.nodes[v]['color'] = 'red'`), at which point it makes
+a private copy, so question authors can never corrupt the shared graphs.
+"""
+import collections
+import collections.abc
+import concurrent.futures
+import copy
+import functools
+import networkx as nx
+import random
+import threading
+import weakref
+
+import numpy as np
+
+from graphquest import serialize
+from graphquest.solutions import SolutionIndex, decode_solutions, encode_solutions
+
+# Frozen graphs, mapped to whether their attribute values are all immutable (so views can safely share them)
+__frozen = weakref.WeakKeyDictionary()
+
+__view_classes = {}
+
+__ATOMIC_TYPES = {int, float, complex, str, bytes, bool, type(None)}
+
+
+class _FrozenAttrs(dict):
+    """An attribute dictionary of a frozen graph, which can't be modified in place."""
+    __slots__ = ()
+
+    def __readonly(self, *args, **kwargs):
+        raise TypeError('The attributes of a frozen graph are read-only. Change them through a view\'s '
+                        'graph, nodes, edges or adj, or use graph.copy() to get a graph that can be modified.')
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = __readonly
+
+    def copy(self):
+        return dict(self)
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(dict(self), memo)
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+def _thawing(method):
+    def wrapper(self, *args, **kwargs):
+        if self._view is not None:
+            self._view._thaw()
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+class _ViewAttrs(dict):
+    """A view's own copy of an attribute dictionary of its frozen graph.
+
+    Modifying it makes the view copy the frozen graph's storage, keeping this dictionary in the copy.
+    """
+    __slots__ = ('_view',)
+
+    __setitem__ = _thawing(dict.__setitem__)
+    __delitem__ = _thawing(dict.__delitem__)
+    __ior__ = _thawing(dict.__ior__)
+    clear = _thawing(dict.clear)
+    pop = _thawing(dict.pop)
+    popitem = _thawing(dict.popitem)
+    setdefault = _thawing(dict.setdefault)
+    update = _thawing(dict.update)
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(dict(self), memo)
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class _ViewLevel(collections.abc.Mapping):
+    """A level of a view's storage (e.g. `_node` or `_adj[u]`), as seen through its accessors.
+
+    It always reads the view's current storage, and hands out the view's own copies of the attribute
+    dictionaries until the view has been modified.
+    """
+    __slots__ = ('__view', '__path', '__depth')
+
+    def __init__(self, view, path: tuple, depth: int):
+        self.__view = view
+        self.__path = path
+        self.__depth = depth
+
+    def __mapping(self) -> dict:
+        mapping = self.__view.__dict__[self.__path[0]]
+        for key in self.__path[1:]:
+            mapping = mapping[key]
+        return mapping
+
+    def __getitem__(self, key):
+        value = self.__mapping()[key]
+        if self.__depth > 1:
+            return _ViewLevel(self.__view, self.__path + (key,), self.__depth - 1)
+        return self.__view._own(value)
+
+    def __iter__(self):
+        return iter(self.__mapping())
+
+    def __len__(self):
+        return len(self.__mapping())
+
+    def __contains__(self, key):
+        return key in self.__mapping()
+
+
+def _storage(G: nx.Graph) -> list[str]:
+    """Returns the names of the attributes that hold a graph's data."""
+    return ['graph', '_node', '_adj', '_succ', '_pred'] if G.is_directed() else ['graph', '_node', '_adj']
+
+
+def _restore(cls: type, storage: dict) -> nx.Graph:
+    """Creates a graph of the given class with the given storage."""
+    G = cls.__new__(cls)
+    G.__dict__.update(storage)
+    G.__dict__['__networkx_cache__'] = {}
+    return G
+
+
+def _is_atomic(value) -> bool:
+    if type(value) in (tuple, frozenset):
+        return all(map(_is_atomic, value))
+    return type(value) in __ATOMIC_TYPES
+
+
+class _CopyOnWrite:
+    """Mixin for views of a frozen graph, which share its storage until they are first modified."""
+
+    def _own(self, d: dict) -> dict:
+        """Returns this view's own copy of an attribute dictionary of its frozen graph, while it is shared."""
+        copies = self.__dict__.get('_copies')
+        if copies is None:
+            return d
+        if id(d) not in copies:
+            copies[id(d)] = _ViewAttrs(d)
+            copies[id(d)]._view = self
+        return copies[id(d)]
+
+    def _accessors(self) -> nx.Graph:
+        """Returns a graph of the base class that reads this view's storage, which the accessors
+        (e.g. `nodes` and `edges`) are taken from while the view is shared, so that modifying
+        an attribute dictionary they hand out makes the view copy its storage first."""
+        if '_accessor_graph' not in self.__dict__:
+            depth = 3 if self.is_multigraph() else 2
+            storage = {'graph': self.graph, '_node': _ViewLevel(self, ('_node',), 1)}
+            storage.update((name, _ViewLevel(self, (name,), depth)) for name in _storage(self)[2:])
+            self.__dict__['_accessor_graph'] = _restore(self._base, storage)
+        return self.__dict__['_accessor_graph']
+
+    def _thaw(self):
+        """Replace the shared storage with a private copy, if this hasn't been done already."""
+        if not self.__dict__.pop('_shared', False):
+            return
+        del self.__dict__['_source']
+        self.__dict__.pop('_accessor_graph', None)
+
+        # Both directions of an edge share their attribute dictionary (and their key dictionary in multigraphs).
+        # The copies that the accessors have already handed out are kept.
+        copies = self.__dict__.pop('_copies')
+        for d in copies.values():
+            d._view = None
+
+        def leaf(d):
+            if id(d) not in copies:
+                copies[id(d)] = dict(d)
+            return copies[id(d)]
+
+        def keys(d):
+            if id(d) not in copies:
+                copies[id(d)] = {key: leaf(dd) for key, dd in d.items()}
+            return copies[id(d)]
+
+        if self.is_multigraph():
+            def level(nbrs):
+                return {v: keys(d) for v, d in nbrs.items()}
+        else:
+            def level(nbrs):
+                return {v: leaf(d) for v, d in nbrs.items()}
+
+        # Drop the cached views of the shared storage (e.g. G.nodes and G.edges).
+        for name in list(self.__dict__):
+            if isinstance(getattr(type(self), name, None), functools.cached_property):
+                del self.__dict__[name]
+        self.__dict__['__networkx_cache__'] = {}
+
+        self._node = {v: leaf(d) for v, d in self._node.items()}
+        if self.is_directed():
+            self._succ = {u: level(nbrs) for u, nbrs in self._succ.items()}
+            self._pred = {u: level(nbrs) for u, nbrs in self._pred.items()}
+        else:
+            self._adj = {u: level(nbrs) for u, nbrs in self._adj.items()}
+
+    def __reduce__(self):
+        # Pickled (and deep copied) views become ordinary graphs.
+        return _restore, (self._base, {name: self.__dict__[name] for name in _storage(self)})
+
+    def __copy__(self):
+        return view(self) if self.__dict__.get('_shared') else self.copy()
+
+    @property
+    def name(self):
+        return self.graph.get('name', '')
+
+    @name.setter
+    def name(self, s):
+        self._thaw()
+        self.graph['name'] = s
+
+
+def __copy_on_write(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._thaw()
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+def __through_accessors(attribute):
+    def target(self):
+        return self._accessors() if '_shared' in self.__dict__ else self
+
+    if isinstance(attribute, functools.cached_property):
+        return property(lambda self: attribute.__get__(target(self), type(self)), doc=attribute.__doc__)
+
+    @functools.wraps(attribute)
+    def wrapper(self, *args, **kwargs):
+        return attribute(target(self), *args, **kwargs)
+    return wrapper
+
+
+__MODIFIERS = ['add_node', 'add_nodes_from', 'remove_node', 'remove_nodes_from', 'add_edge', 'add_edges_from',
+               'add_weighted_edges_from', 'remove_edge', 'remove_edges_from', 'update', 'clear', 'clear_edges']
+
+# The accessors that hand out attribute dictionaries
+__ACCESSORS = ['nodes', 'edges', 'adj', 'succ', 'pred', 'in_edges', 'out_edges', '__getitem__', 'get_edge_data',
+               'adjacency']
+
+
+def __view_class(cls: type) -> type:
+    if cls not in __view_classes:
+        methods = {name: __copy_on_write(getattr(cls, name)) for name in __MODIFIERS if hasattr(cls, name)}
+        methods.update((name, __through_accessors(getattr(cls, name))) for name in __ACCESSORS if hasattr(cls, name))
+        __view_classes[cls] = type(f'CopyOnWrite{cls.__name__}', (_CopyOnWrite, cls), {**methods, '_base': cls})
+    return __view_classes[cls]
+
+
+def __freeze_graph(G: nx.Graph) -> nx.Graph:
+    atomic = True
+
+    def leaf(d):
+        nonlocal atomic
+        if type(d) is not _FrozenAttrs:
+            atomic = atomic and all(map(_is_atomic, d.values()))
+            d = _FrozenAttrs(d)
+        return d
+
+    G.graph = leaf(G.graph)
+    for v, d in G._node.items():
+        G._node[v] = leaf(d)
+
+    # Both directions of an edge must keep sharing one attribute dictionary.
+    adjacencies = [G._succ, G._pred] if G.is_directed() else [G._adj]
+    frozen = {}
+    for adj in adjacencies:
+        for nbrs in adj.values():
+            for v, d in nbrs.items():
+                if G.is_multigraph():
+                    for key, dd in d.items():
+                        if id(dd) not in frozen:
+                            frozen[id(dd)] = leaf(dd)
+                        d[key] = frozen[id(dd)]
+                else:
+                    if id(d) not in frozen:
+                        frozen[id(d)] = leaf(d)
+                    nbrs[v] = frozen[id(d)]
+
+    nx.freeze(G)
+    __frozen[G] = atomic
+    return G
+
+
+def freeze(graphs: nx.Graph | list[nx.Graph]) -> nx.Graph | list[nx.Graph]:
+    """Freeze graphs in place, so they can be shared by views.
+
+    Frozen graphs can't be modified: modifying methods raise a `networkx.NetworkXError`,
+    and modifying an attribute dictionary (e.g. `G.nodes[v]`) raises a `TypeError`.
+
+    Parameters
+    ----------
+    graphs : networkx Graph | [networkx Graph]
+        The graphs to freeze.
+
+    Returns
+    -------
+    graphs : networkx Graph | [networkx Graph]
+        The same graphs.
+    """
+    if isinstance(graphs, nx.Graph):
+        return graphs if graphs in __frozen else __freeze_graph(graphs)
+    return [freeze(G) for G in graphs]
+
+
+def view(graphs: nx.Graph | list[nx.Graph]) -> nx.Graph | list[nx.Graph]:
+    """Create copy-on-write views of frozen graphs.
+
+    A view shares the storage of its frozen graph until one of its modifying methods
+    (e.g. `add_edge()` or `remove_node()`) is called, or one of the attribute dictionaries handed out by
+    its `graph`, `nodes`, `edges`, `adj`, `succ`, `pred` or `[]` accessors is modified,
+    when it makes a private copy. Until then, its internal dictionaries (e.g. `view._adj`) are read-only.
+    If a graph has mutable attribute values (e.g. lists), which views can't protect, it is deep copied instead.
+
+    Parameters
+    ----------
+    graphs : networkx Graph | [networkx Graph]
+        The graphs to view. If they aren't already frozen, they are frozen in place.
+
+    Returns
+    -------
+    views : networkx Graph | [networkx Graph]
+        The views, which are instances of the graphs' own classes.
+        Views of a list of graphs record their positions in it, which memoized methods use to tell them apart.
+    """
+    if not isinstance(graphs, nx.Graph):
+        # Each view records its position in the list, which identifies it to memoized methods.
+        views = [view(G) for G in graphs]
+        for i, G in enumerate(views):
+            G.__dict__['_position'] = i
+        return views
+
+    # A view that hasn't been modified yet is viewed through its frozen graph.
+    G = graphs.__dict__.get('_source', graphs)
+    freeze(G)
+    position = graphs.__dict__.get('_position')
+    if not __frozen[G]:
+        result = _restore(type(G), copy.deepcopy({name: G.__dict__[name] for name in _storage(G)}))
+        result.__dict__['_position'] = position
+        return result
+
+    cls = __view_class(G._base if isinstance(G, _CopyOnWrite) else type(G))
+    result = cls.__new__(cls)
+    result.__dict__.update({name: G.__dict__[name] for name in _storage(G)})
+    result.__dict__.update(_shared=True, _source=G, _copies={}, _position=position, __networkx_cache__={})
+    result.__dict__['graph'] = result._own(G.graph)
+    return result
+
+
+class Instance:
+    """A generated question instance, i.e. what is sent to the student.
+
+    Attributes
+    ----------
+    question : Question
+        The question object, whose attributes hold the settings.
+
+    graphs : networkx Graph | [networkx Graph]
+        The frozen graphs returned by `generate_data()`.
+
+    description : str
+        The question text returned by `generate_question()`.
+
+    solutions : None | list[any]
+        The solutions returned by `generate_solutions()`, or `None` if the question gives feedback instead.
+
+    index : None | SolutionIndex
+        The index of the solutions that answers are verified against, or `None` if the question gives feedback.
+
+    artifacts : dict
+        The results of the question's memoized methods (see `question.memoize`), which are given back to
+        the question object before `generate_feedback()` is called.
+    """
+    def __init__(self, question, graphs, description: str, solutions=None, index=None, artifacts=None):
+        self.question = question
+        self.graphs = graphs
+        self.description = description
+        self.solutions = solutions
+        self.index = index
+        self.artifacts = {} if artifacts is None else artifacts
+        if index is None and solutions is not None:
+            self.index = SolutionIndex.build(question, graphs, solutions)
+
+    def dumps(self, binary=False) -> str | bytes:
+        """Serialize the instance (see `serialize.dumps()`)."""
+        return serialize.dumps(self.question, self.graphs, binary=binary,
+                               description=self.description, solutions=encode_solutions(self.solutions),
+                               index=None if self.index is None else self.index.to_dict(), artifacts=self.artifacts)
+
+    @classmethod
+    def loads(cls, data: str | bytes, question_class=None):
+        """Deserialize an instance created by `dumps()`."""
+        question, graphs, fields = serialize.loads(data, question_class)
+        index = None if fields['index'] is None else SolutionIndex.from_dict(fields['index'])
+        return cls(question, freeze(graphs), fields['description'], decode_solutions(fields['solutions']), index,
+                   fields.get('artifacts'))
+
+
+def generate(cls: type, cache=None) -> Instance:
+    """Generate an instance of a question class (steps 1 to 5 of the question lifecycle).
+
+    Parameters
+    ----------
+    cls : type
+        The question class.
+
+    cache : None | SolutionCache
+        A cache to reuse solutions from, for question classes that set `cache_solutions = True`.
+
+    Returns
+    -------
+    instance : Instance
+        The generated instance.
+    """
+    question = cls()
+    graphs = freeze(question.generate_data())
+    description = question.generate_question(view(graphs))
+    solutions = None
+    if not question.feedback:
+        if cache is not None and cache.applies(question, graphs):
+            solutions = cache.get(question, graphs)
+            if solutions is None:
+                solutions = question.generate_solutions(view(graphs))
+                cache.put(question, graphs, solutions)
+        else:
+            solutions = question.generate_solutions(view(graphs))
+    # The artifacts are kept apart from the settings, which are sent to the student.
+    return Instance(question, graphs, description, solutions, artifacts=question.__dict__.pop('_artifacts', None))
+
+
+def grade(instance: Instance, answer) -> (bool, str):
+    """Verify a student's answer to a question instance (steps 8 and 9 of the question lifecycle).
+
+    If the question gives feedback, any updates its `generate_feedback()` method makes to
+    the `highlighted_nodes` and `highlighted_edges` settings are captured in `instance.question`,
+    and any new results of its memoized methods are added to `instance.artifacts`.
+
+    Parameters
+    ----------
+    instance : Instance
+        The question instance.
+
+    answer : any
+        The student's answer.
+
+    Returns
+    -------
+    (correct, feedback) : (bool, str)
+        Whether the answer is correct, and the feedback to show (empty if the question doesn't give feedback).
+    """
+    if not instance.question.feedback:
+        return instance.index.accepts(answer, instance.graphs), ''
+
+    # Another object of the question class is instantiated, with the instance's settings.
+    question = type(instance.question)()
+    question.__dict__.update(copy.deepcopy(vars(instance.question)))
+    question.__dict__['_artifacts'] = dict(instance.artifacts)
+    correct, feedback = question.generate_feedback(view(instance.graphs), answer)
+    instance.question.highlighted_nodes = question.highlighted_nodes
+    instance.question.highlighted_edges = question.highlighted_edges
+    instance.artifacts.update(question.__dict__.pop('_artifacts', {}))
+    return correct, feedback
+
+
+def _produce(cls: type, binary: bool) -> str | bytes:
+    """Generates and serializes an instance of a question class for a `QuestionPool`."""
+    return generate(cls).dumps(binary=binary)
+
+
+def _reseed():
+    # Forked worker processes inherit the parent's random state, so would otherwise generate the same instances.
+    random.seed()
+    np.random.seed()
+
+
+class QuestionPool:
+    """A pool of question instances that are generated in the background, ready to be served.
+
+    Each question class has a queue of serialized instances (see `Instance.dumps()`),
+    which is refilled up to its capacity by worker threads or processes as instances are taken from it,
+    so serving an instance doesn't wait for the question's methods to run.
+
+    Refilling is bounded: a class never has more than its capacity of instances queued or being generated,
+    and no more than `workers` instances are generated at a time across all classes.
+    A failed generation isn't retried until the next instance of the class is requested.
+
+    Parameters
+    ----------
+    classes : [type] | dict[type, int]
+        The question classes to pre-generate instances of, optionally mapped to their own capacities.
+
+    capacity : int
+        The number of instances kept ready for each class (unless given in `classes`).
+
+    workers : None | int
+        The number of worker threads or processes. Defaults to the number of CPUs.
+
+    processes : bool
+        If `True`, instances are generated in worker processes, so that generation doesn't hold the GIL.
+        The question classes must then be defined at the top level of a module.
+
+    binary : bool
+        Whether instances are serialized in the binary format.
+
+    Attributes
+    ----------
+    hits : collections.Counter
+        The number of instances of each class that were served from the queue.
+
+    misses : collections.Counter
+        The number of instances of each class that had to be generated on request because the queue was empty.
+
+    errors : collections.Counter
+        The number of background generations of each class that raised an exception.
+    """
+    def __init__(self, classes, capacity=8, workers=None, processes=False, binary=True):
+        capacities = dict(classes) if isinstance(classes, dict) else dict.fromkeys(classes, capacity)
+        assert all(n > 0 for n in capacities.values()), 'capacity must be positive'
+        self.capacities = capacities
+        self.binary = binary
+        self.hits = collections.Counter()
+        self.misses = collections.Counter()
+        self.errors = collections.Counter()
+        self.__queues = {cls: collections.deque() for cls in capacities}
+        self.__pending = collections.Counter()
+        self.__lock = threading.Lock()
+        if processes:
+            self.__executor = concurrent.futures.ProcessPoolExecutor(workers, initializer=_reseed)
+        else:
+            self.__executor = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix='QuestionPool')
+        for cls in capacities:
+            self.__refill(cls)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self, wait=True):
+        """Stop refilling the pool. Instances that are already queued can still be taken."""
+        self.__executor.shutdown(wait=wait, cancel_futures=True)
+
+    def __refill(self, cls: type):
+        """Starts generating enough instances of a class to fill its queue."""
+        with self.__lock:
+            n = self.capacities[cls] - len(self.__queues[cls]) - self.__pending[cls]
+            self.__pending[cls] += max(n, 0)
+        for _ in range(n):
+            try:
+                future = self.__executor.submit(_produce, cls, self.binary)
+            except RuntimeError:
+                # The pool has been closed.
+                with self.__lock:
+                    self.__pending[cls] -= 1
+                continue
+            future.add_done_callback(functools.partial(self.__finished, cls))
+
+    def __finished(self, cls: type, future: concurrent.futures.Future):
+        with self.__lock:
+            self.__pending[cls] -= 1
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self.errors[cls] += 1
+                return
+            self.__queues[cls].append(future.result())
+
+    def pop(self, cls: type) -> str | bytes:
+        """Take a serialized instance of a question class from the pool.
+
+        If none is ready, one is generated in the calling thread. Either way, the queue is then refilled.
+
+        Parameters
+        ----------
+        cls : type
+            The question class, which must be one of the pool's classes.
+
+        Returns
+        -------
+        data : str | bytes
+            The serialized instance.
+        """
+        assert cls in self.capacities, f'{cls.__name__} is not in the pool'
+        with self.__lock:
+            queue = self.__queues[cls]
+            data = queue.popleft() if queue else None
+            if data is None:
+                self.misses[cls] += 1
+            else:
+                self.hits[cls] += 1
+        self.__refill(cls)
+        return _produce(cls, self.binary) if data is None else data
+
+    def get(self, cls: type) -> Instance:
+        """Take an instance of a question class from the pool (see `pop()`)."""
+        return Instance.loads(self.pop(cls), cls)
+
+    def stats(self) -> dict:
+        """Returns, for each class, the number of instances that are ready and being generated,
+        the numbers of hits, misses and errors, and the hit rate (or `None` before any requests)."""
+        with self.__lock:
+            result = {}
+            for cls in self.capacities:
+                hits, misses = self.hits[cls], self.misses[cls]
+                result[cls] = {'ready': len(self.__queues[cls]), 'pending': self.__pending[cls],
+                               'hits': hits, 'misses': misses, 'errors': self.errors[cls],
+                               'hit_rate': hits / (hits + misses) if hits + misses else None}
+            return result
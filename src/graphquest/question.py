@@ -3,14 +3,72 @@
 To create a new question type, extend one of the base classes and implement its methods.
 """
 from abc import ABC, abstractmethod
+import functools
 import networkx as nx
 
 
+def memoize(method):
+    """Decorator for question methods that compute derived facts about the graphs, e.g. shortest paths.
+
+    The result is stored with the question instance, so it is only computed once:
+    if it is computed while the instance is generated, `generate_feedback()` reuses it rather than computing it again.
+    Arguments that are the question's graphs (or lists of them) are identified by their position in the instance's
+    list of graphs, so they must be the graphs passed to the question's methods, not graphs derived from them.
+    The other arguments (positional or keyword) must be hashable, and the results must be serializable
+    like the `data` setting. The results are shared, so they must not be modified.
+
+    Parameters
+    ----------
+    method : function
+        The method to memoize.
+
+    Returns
+    -------
+    wrapper : function
+        The memoized method.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, tuple(map(__key, args)),
+               tuple((name, __key(value)) for name, value in sorted(kwargs.items())))
+        artifacts = self.__dict__.setdefault('_artifacts', {})
+        if key not in artifacts:
+            artifacts[key] = method(self, *args, **kwargs)
+        return artifacts[key]
+    return wrapper
+
+
+def __position(G: nx.Graph) -> int | None:
+    """Returns a graph's position in its instance's list of graphs (or None if the instance has a single graph)."""
+    try:
+        return G.__dict__['_position']
+    except KeyError:
+        raise TypeError('Memoized methods can only be given the graphs passed to the question\'s methods '
+                        '(or lists of them), not graphs derived from them') from None
+
+
+def __key(value):
+    """Returns the part of a memoized method's key for an argument."""
+    if isinstance(value, nx.Graph):
+        return 'graph', __position(value)
+    if isinstance(value, list | tuple) and any(isinstance(G, nx.Graph) for G in value):
+        return 'graphs', tuple(__position(G) for G in value)
+    return value
+
+
 class Question(ABC):
     """Abstract base class for all question types.
 
     Do not directly extend this class. Instead, extend its children (e.g. QTextInput).
+
+    Set the class attribute `cache_solutions` to `True` to let the solutions be reused for isomorphic graphs
+    (see `solutions.SolutionCache` for the conditions this requires).
+
+    Methods decorated with `memoize` store their results with the question instance (rather than in its settings),
+    so facts computed while generating the question don't need to be recomputed by `generate_feedback()`.
     """
+    cache_solutions = False
+
     def __init__(self,
                  layout='force-directed',
                  feedback=False,
@@ -81,6 +139,7 @@ class Question(ABC):
         -------
         solutions : [any]
             A set of possible solutions.
+            It may also include validators (see the `solutions` module), which describe solutions by a property.
 
         Raises
         ------
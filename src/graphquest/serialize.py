@@ -0,0 +1,386 @@
+"""Functions for compactly serializing question instances and their graphs.
+
+A question instance is a question object (whose attributes hold its settings), the graphs it was
+generated with, and any other generated fields (e.g. the description and solutions).
+
+Graphs are stored as flat lists of each node's neighbours, with node and edge attributes stored as columns
+(one list per attribute), rather than as one JSON object per node and edge.
+This makes them smaller and faster to encode and decode, and a graph is restored exactly:
+the order of its nodes, of each node's neighbours and of each attribute dictionary's keys is kept,
+as are the types of the attribute values (e.g. tuples and numpy scalars). Two formats are supported:
+
+* text (the default): a JSON document, in which lists of integers or floats are packed into base64 encoded arrays;
+* binary: a short header followed by either a msgpack document (if msgpack is installed)
+  or a varint-prefixed JSON header, with the packed arrays stored as raw bytes.
+"""
+import sys
+from array import array
+import base64
+import importlib
+import itertools
+import json
+import networkx as nx
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Identifies the binary format, and is followed by a byte naming the codec used for the rest of the data
+__MAGIC = b'GQ\x01'
+
+__GRAPH_CLASSES = {cls.__name__: cls for cls in [nx.Graph, nx.DiGraph, nx.MultiGraph, nx.MultiDiGraph]}
+
+# The array typecodes that integers are packed into (smallest first), with the range of each
+__INT_TYPES = [('B', 0, 2 ** 8 - 1), ('b', -2 ** 7, 2 ** 7 - 1), ('H', 0, 2 ** 16 - 1), ('h', -2 ** 15, 2 ** 15 - 1),
+               ('I', 0, 2 ** 32 - 1), ('i', -2 ** 31, 2 ** 31 - 1), ('q', -2 ** 63, 2 ** 63 - 1)]
+
+__SCALARS = {str, int, float, bool, type(None)}
+
+# The keys that mark an encoded value of a type that JSON lacks
+__TAGS = {'__tuple__', '__items__', '__set__', '__frozenset__', '__numpy__'}
+
+
+def __encode_value(value):
+    """Converts a value to plain JSON data, tagging the types that JSON would otherwise lose."""
+    if type(value) in __SCALARS:
+        return value
+    if isinstance(value, tuple):
+        return {'__tuple__': [__encode_value(v) for v in value]}
+    if isinstance(value, list):
+        return [__encode_value(v) for v in value]
+    if isinstance(value, dict):
+        if all(isinstance(k, str) for k in value) and not (len(value) == 1 and next(iter(value)) in __TAGS):
+            return {k: __encode_value(v) for k, v in value.items()}
+        return {'__items__': [[__encode_value(k), __encode_value(v)] for k, v in value.items()]}
+    if isinstance(value, set | frozenset):
+        return {'__set__' if isinstance(value, set) else '__frozenset__': [__encode_value(v) for v in value]}
+    if isinstance(value, np.generic):
+        return {'__numpy__': [value.dtype.str, value.item()]}
+    return value
+
+
+def __decode_value(value):
+    """Reverses `__encode_value`."""
+    if type(value) in __SCALARS:
+        return value
+    if isinstance(value, list):
+        return [__decode_value(v) for v in value]
+    if isinstance(value, dict):
+        if len(value) == 1:
+            (tag, items), = value.items()
+            if tag == '__tuple__':
+                return tuple(__decode_value(v) for v in items)
+            if tag == '__items__':
+                return {__decode_value(k): __decode_value(v) for k, v in items}
+            if tag == '__set__':
+                return set(__decode_value(v) for v in items)
+            if tag == '__frozenset__':
+                return frozenset(__decode_value(v) for v in items)
+            if tag == '__numpy__':
+                return np.dtype(items[0]).type(items[1])
+        return {k: __decode_value(v) for k, v in value.items()}
+    return value
+
+
+def __int_typecode(low: int, high: int) -> str | None:
+    return next((code for code, minimum, maximum in __INT_TYPES if minimum <= low and high <= maximum), None)
+
+
+def __typecode(values: list) -> str | None:
+    """Returns the typecode of the smallest array that holds a list of floats or integers exactly, if there is one.
+
+    Lists that mix types (or contain bools) are not packed, so that the values are restored with the same types.
+    """
+    types = set(map(type, values))
+    if types == {float}:
+        return 'd'
+    if types == {int}:
+        return __int_typecode(min(values), max(values))
+    return None
+
+
+def __pack(typecode: str, values: list) -> bytes:
+    packed = array(typecode, values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def __unpack(typecode: str, data: bytes) -> list:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tolist()
+
+
+def __store(values: list, arrays: list, typecode: str | None) -> int:
+    """Adds a list of scalars to `arrays` and returns its index. The list is packed into an array of the typecode."""
+    arrays.append((typecode, values))
+    return len(arrays) - 1
+
+
+def __encode_attrs(records: list, arrays: list) -> dict:
+    """Encodes a list of attribute dictionaries.
+
+    If they all have the same keys in the same order, each attribute is stored as a column:
+    an index into `arrays` if its values are all scalars, or else a list of encoded values.
+    """
+    if not any(records):
+        return {'length': len(records), 'keys': [], 'columns': []}
+    keys = list(records[0])
+    if not all(map(keys.__eq__, map(list, records))):
+        return {'records': __encode_value(records)}
+    columns = []
+    for key in keys:
+        values = [d[key] for d in records]
+        typecode = __typecode(values)
+        if typecode or set(map(type, values)) <= __SCALARS:
+            columns.append(__store(values, arrays, typecode))
+        else:
+            columns.append(__encode_value(values))
+    return {'length': len(records), 'keys': __encode_value(keys), 'columns': columns}
+
+
+def __decode_attrs(data: dict, arrays: list) -> list:
+    if 'records' in data:
+        return __decode_value(data['records'])
+    records = [{} for _ in range(data['length'])]
+    for key, column in zip(__decode_value(data['keys']), data['columns']):
+        for d, value in zip(records, arrays[column] if type(column) is int else __decode_value(column)):
+            d[key] = value
+    return records
+
+
+def __encode_graph(G: nx.Graph, arrays: list) -> dict:
+    nodes = list(G)
+    result = {'class': ('Multi' if G.is_multigraph() else '') + ('DiGraph' if G.is_directed() else 'Graph')}
+    if G.graph:
+        result['graph'] = __encode_value(G.graph)
+
+    # Edges refer to nodes by label if the labels are integers, and otherwise by position in the node list.
+    typecode = __typecode(nodes)
+    if typecode not in (None, 'd'):
+        result['nodes'] = __store(nodes, arrays, typecode)
+        positions = list
+    else:
+        result['labels'] = __encode_value(nodes)
+        typecode = __int_typecode(0, len(nodes))
+        index = dict(zip(nodes, range(len(nodes))))
+
+        def positions(labels):
+            return list(map(index.__getitem__, labels))
+
+    if G.is_multigraph():
+        edges = list(G.edges(keys=True, data=True))
+        result['keys'] = __encode_value([key for _, _, key, _ in edges])
+        result['edges'] = __store(positions([x for u, v, _, _ in edges for x in (u, v)]), arrays, typecode)
+        records = [d for _, _, _, d in edges]
+    else:
+        # Each node's neighbours are stored in order, so that the adjacency is restored exactly.
+        # A node has at most one entry per neighbour, so its degree is at most the number of nodes.
+        degree_typecode = __int_typecode(0, len(nodes))
+        rows = list(map(G._adj.__getitem__, nodes))
+        result['degrees'] = __store(list(map(len, rows)), arrays, degree_typecode)
+        result['neighbors'] = __store(positions(itertools.chain.from_iterable(rows)), arrays, typecode)
+        if G.is_directed():
+            predecessors = list(map(G._pred.__getitem__, nodes))
+            result['in_degrees'] = __store(list(map(len, predecessors)), arrays, degree_typecode)
+            result['predecessors'] = __store(positions(itertools.chain.from_iterable(predecessors)), arrays, typecode)
+        # The edge attributes are stored in the order of G.edges(), and only if there are any.
+        records = None
+        if any(itertools.chain.from_iterable(map(dict.values, rows))):
+            records = [d for _, _, d in G.edges(data=True)]
+
+    result['node_attrs'] = __encode_attrs(list(G._node.values()), arrays)
+    if records:
+        result['edge_attrs'] = __encode_attrs(records, arrays)
+    return result
+
+
+def __decode_graph(data: dict, arrays: list) -> nx.Graph:
+    G = __GRAPH_CLASSES[data['class']]()
+    if 'graph' in data:
+        G.graph.update(__decode_value(data['graph']))
+    if 'nodes' in data:
+        nodes = arrays[data['nodes']]
+
+        def labels(name):
+            return arrays[data[name]]
+    else:
+        nodes = __decode_value(data['labels'])
+
+        def labels(name):
+            return list(map(nodes.__getitem__, arrays[data[name]]))
+
+    # The graph's dictionaries are filled directly, since the nodes and edges are known to be valid.
+    G._node.update(zip(nodes, __decode_attrs(data['node_attrs'], arrays)))
+    if 'keys' in data:
+        keys = __decode_value(data['keys'])
+        ends = iter(labels('edges'))
+        attrs = __decode_attrs(data['edge_attrs'], arrays) if 'edge_attrs' in data else [{} for _ in keys]
+        G._adj.update((v, {}) for v in nodes)
+        if G.is_directed():
+            G._pred.update((v, {}) for v in nodes)
+        G.add_edges_from(zip(ends, ends, keys, attrs))
+        return G
+
+    # Each edge's attribute dictionary is created when it is first reached, which is the order of G.edges().
+    neighbors = iter(labels('neighbors'))
+    new = iter(__decode_attrs(data['edge_attrs'], arrays)).__next__ if 'edge_attrs' in data else dict
+    if G.is_directed():
+        succ = G._succ
+        for u, degree in zip(nodes, arrays[data['degrees']]):
+            row = succ[u] = {}
+            for v in itertools.islice(neighbors, degree):
+                row[v] = new()
+        predecessors = iter(labels('predecessors'))
+        pred = G._pred
+        for v, degree in zip(nodes, arrays[data['in_degrees']]):
+            row = pred[v] = {}
+            for u in itertools.islice(predecessors, degree):
+                row[u] = succ[u][v]
+    else:
+        # The dictionary is shared with the other endpoint when its row is reached (a self-loop has one entry).
+        adj = G._adj
+        for u, degree in zip(nodes, arrays[data['degrees']]):
+            row = {}
+            for v in itertools.islice(neighbors, degree):
+                row[v] = adj[v][u] if v in adj else new()
+            adj[u] = row
+    return G
+
+
+def __to_document(question, graphs, fields) -> dict:
+    cls = type(question)
+    single = isinstance(graphs, nx.Graph)
+    arrays = []
+    return {
+        'class': f'{cls.__module__}:{cls.__qualname__}',
+        'settings': __encode_value(vars(question)),
+        'single': single,
+        'graphs': [__encode_graph(G, arrays) for G in ([graphs] if single else graphs)],
+        'fields': __encode_value(fields),
+        'arrays': arrays,
+    }
+
+
+def __from_document(document: dict, cls):
+    if cls is None:
+        module, _, name = document['class'].partition(':')
+        cls = importlib.import_module(module)
+        for part in name.split('.'):
+            cls = getattr(cls, part)
+
+    # The constructor is skipped, since the settings are restored directly.
+    question = cls.__new__(cls)
+    question.__dict__.update(__decode_value(document['settings']))
+    graphs = [__decode_graph(data, document['arrays']) for data in document['graphs']]
+    return question, graphs[0] if document['single'] else graphs, __decode_value(document['fields'])
+
+
+def __varint(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte, n = n & 0x7F, n >> 7
+        out.append(byte | (0x80 if n else 0))
+        if not n:
+            return bytes(out)
+
+
+def __read_varint(data: bytes, i: int) -> (int, int):
+    n = shift = 0
+    while True:
+        byte = data[i]
+        n |= (byte & 0x7F) << shift
+        shift += 7
+        i += 1
+        if not byte & 0x80:
+            return n, i
+
+
+def dumps(question, graphs, binary=False, **fields) -> str | bytes:
+    """Serialize a question instance.
+
+    Parameters
+    ----------
+    question : Question
+        The question object. Its attributes (i.e. its settings, including `data`) are stored.
+
+    graphs : networkx Graph | [networkx Graph]
+        The graphs returned by the question's `generate_data()` method.
+
+    binary : bool
+        If `True`, return compact binary data instead of a JSON string.
+
+    **fields
+        Any other JSON serializable values to store, e.g. `description` or `solutions`.
+
+    Returns
+    -------
+    data : str | bytes
+        The serialized instance.
+    """
+    document = __to_document(question, graphs, fields)
+    # Packed arrays are stored as their typecode followed by their data (base64 encoded in the JSON format),
+    # and any other arrays as lists.
+    arrays = document['arrays']
+    if not binary:
+        document['arrays'] = [values if code is None else code + base64.b64encode(__pack(code, values)).decode('ascii')
+                              for code, values in arrays]
+        return json.dumps(document, separators=(',', ':'))
+    packed = [None if code is None else __pack(code, values) for code, values in arrays]
+    if msgpack is not None:
+        document['arrays'] = [values if data is None else code.encode('ascii') + data
+                              for (code, values), data in zip(arrays, packed)]
+        return __MAGIC + b'm' + msgpack.packb(document, use_bin_type=True)
+
+    # Without msgpack, the data of the packed arrays is appended after a JSON header that records their sizes.
+    document['arrays'] = [values if data is None else code + str(len(data)) for (code, values), data in zip(arrays, packed)]
+    header = json.dumps(document, separators=(',', ':')).encode()
+    return b''.join([__MAGIC, b'j', __varint(len(header)), header, *filter(None, packed)])
+
+
+def loads(data: str | bytes, cls=None):
+    """Deserialize a question instance created by `dumps()`.
+
+    Parameters
+    ----------
+    data : str | bytes
+        The serialized instance.
+
+    cls : None | type
+        The question class. If `None`, it is imported by name.
+
+    Returns
+    -------
+    (question, graphs, fields) : (Question, networkx Graph | [networkx Graph], dict)
+        The question object (its constructor is not called), its graphs and the other stored fields.
+    """
+    if isinstance(data, str):
+        document = json.loads(data)
+        document['arrays'] = [values if isinstance(values, list) else __unpack(values[0], base64.b64decode(values[1:]))
+                              for values in document['arrays']]
+        return __from_document(document, cls)
+
+    if not data.startswith(__MAGIC):
+        raise ValueError('Not a serialized question instance')
+    codec, i = data[len(__MAGIC):len(__MAGIC) + 1], len(__MAGIC) + 1
+    if codec == b'm':
+        if msgpack is None:
+            raise ImportError('msgpack is required to load this data')
+        document = msgpack.unpackb(data[i:], raw=False, strict_map_key=False)
+        document['arrays'] = [values if isinstance(values, list) else __unpack(chr(values[0]), values[1:])
+                              for values in document['arrays']]
+    else:
+        length, i = __read_varint(data, i)
+        document = json.loads(data[i:i + length])
+        arrays, i = document['arrays'], i + length
+        for j, values in enumerate(arrays):
+            if not isinstance(values, list):
+                size = int(values[1:])
+                arrays[j] = __unpack(values[0], data[i:i + size])
+                i += size
+    return __from_document(document, cls)
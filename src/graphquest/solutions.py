@@ -0,0 +1,780 @@
+"""Functions and classes for verifying answers against a question's solutions.
+
+Rather than comparing an answer with each solution in turn, the solutions are canonicalized once per instance
+and stored in a hash index, so verifying an answer takes a single lookup.
+
+Solutions can also be described by a property (e.g. any shortest path from a to b) using a validator,
+which checks the student's answer when it is submitted, so the solutions don't need to be listed.
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import json
+import networkx as nx
+import sqlite3
+import threading
+import time
+
+from graphquest import serialize
+from graphquest.question import Question, QSelectPath, QTextInput, QMultipleChoice, QVertexSet, QEdgeSet
+
+__QUESTION_TYPES = [QSelectPath, QTextInput, QMultipleChoice, QVertexSet, QEdgeSet]
+
+
+def question_type(question: Question) -> str:
+    """Returns the name of the question type (e.g. 'QVertexSet') that a question extends."""
+    for cls in __QUESTION_TYPES:
+        if isinstance(question, cls):
+            return cls.__name__
+    raise ValueError(f'{type(question).__name__} does not extend a question type')
+
+
+def _single_graph(graphs: nx.Graph | list[nx.Graph]) -> nx.Graph | None:
+    """Returns the graph of a question with a single graph (given alone or in a list), or None if it has several."""
+    if isinstance(graphs, nx.Graph):
+        return graphs
+    if isinstance(graphs, list | tuple) and len(graphs) == 1 and isinstance(graphs[0], nx.Graph):
+        return graphs[0]
+    return None
+
+
+def __edge(edge, directed: bool) -> tuple:
+    u, v = edge
+    if directed:
+        return u, v
+    try:
+        return (u, v) if u <= v else (v, u)
+    except TypeError:
+        return tuple(sorted((u, v), key=repr))
+
+
+def canonical(kind: str, answer, directed=False):
+    """Converts an answer (or a solution) to a hashable canonical form.
+
+    Answers are equivalent exactly when their canonical forms are equal: paths are sequences of nodes,
+    vertex and edge sets are order-insensitive (as are the endpoints of undirected edges),
+    text answers are compared as strings and multiple choice answers by the options selected.
+
+    Parameters
+    ----------
+    kind : str
+        The question type, e.g. 'QVertexSet'.
+
+    answer : any
+        The answer.
+
+    directed : bool
+        Whether the question's graph is directed (only used by 'QEdgeSet').
+
+    Returns
+    -------
+    key : tuple | frozenset | str
+        The canonical form.
+    """
+    if kind == 'QSelectPath':
+        return tuple(answer)
+    if kind == 'QVertexSet':
+        return frozenset(answer)
+    if kind == 'QEdgeSet':
+        return frozenset(__edge(e, directed) for e in answer)
+    if kind == 'QTextInput':
+        return str(answer)
+    if kind == 'QMultipleChoice':
+        return frozenset(option for option, selected in answer if selected)
+    raise ValueError(f'Unknown question type: {kind}')
+
+
+class Validator(ABC):
+    """Abstract base class for solutions that are described by a property, rather than listed.
+
+    Validators may be returned by `generate_solutions()`, alongside (or instead of) the usual solutions,
+    for the question types listed in `question_types`. For example:
+
+    .. code-block:: python
+
+        def generate_solutions(self, graph):
+            return [solutions.ShortestPath(0, 5)]
+
+    Their parameters must be JSON serializable, since they are stored with the question instance.
+    """
+    question_types = ()
+
+    # The names of the parameters that are nodes, which must be relabelled along with the graph
+    node_parameters = ()
+
+    @abstractmethod
+    def __call__(self, graph: nx.Graph, answer) -> bool:
+        """Checks whether an answer has the property.
+
+        Parameters
+        ----------
+        graph : networkx Graph
+            The graph used in the question.
+
+        answer : any
+            The student's answer.
+
+        Returns
+        -------
+        valid : bool
+            Whether the answer is correct.
+        """
+        raise NotImplementedError
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __hash__(self) -> int:
+        return hash(type(self))
+
+    def __repr__(self) -> str:
+        args = ', '.join(f'{k}={v!r}' for k, v in self.to_dict()['args'].items())
+        return f'{type(self).__name__}({args})'
+
+    def to_dict(self) -> dict:
+        """Returns the validator as a dictionary of its name and parameters."""
+        return {'validator': type(self).__name__,
+                'args': {k: v for k, v in vars(self).items() if not k.startswith('_')}}
+
+    def relabel(self, mapping: dict):
+        """Returns a copy of the validator for a graph whose nodes have been relabelled by the given mapping."""
+        args = self.to_dict()['args']
+        for name in self.node_parameters:
+            if args[name] is not None:
+                args[name] = mapping[args[name]]
+        return type(self)(**args)
+
+    @staticmethod
+    def from_dict(data: dict):
+        """Rebuilds a validator from the dictionary returned by `to_dict()`."""
+        classes = [Validator]
+        while classes:
+            cls = classes.pop()
+            if cls.__name__ == data['validator'] and cls is not Validator:
+                return cls(**data['args'])
+            classes.extend(cls.__subclasses__())
+        raise ValueError(f'Unknown validator: {data["validator"]}')
+
+
+def _is_path(graph: nx.Graph, path: list) -> bool:
+    """Checks that consecutive nodes of a path are joined by edges."""
+    return len(path) > 0 and path[0] in graph and all(graph.has_edge(u, v) for u, v in zip(path, path[1:]))
+
+
+def _path_weight(graph: nx.Graph, path: list, weight) -> float:
+    if weight is None:
+        return len(path) - 1
+    return sum(graph.edges[u, v].get(weight, 1) for u, v in zip(path, path[1:]))
+
+
+def _edge_set(graph: nx.Graph, answer) -> set | None:
+    """Returns the edges of an answer as normalized pairs, or None if any of them isn't in the graph."""
+    edges = {__edge(e, graph.is_directed()) for e in answer}
+    return edges if all(graph.has_edge(u, v) for u, v in edges) else None
+
+
+class ShortestPath(Validator):
+    """Any shortest path between two nodes.
+
+    Parameters
+    ----------
+    source : int
+        The first node of the path.
+
+    target : int
+        The last node of the path.
+
+    weight : None | str
+        The edge attribute holding the edge weights (a missing weight counts as 1).
+        If `None`, every edge has weight 1.
+    """
+    question_types = ('QSelectPath',)
+    node_parameters = ('source', 'target')
+
+    def __init__(self, source, target, weight=None):
+        self.source = source
+        self.target = target
+        self.weight = weight
+
+    def __call__(self, graph, answer):
+        answer = list(answer)
+        if not answer or answer[0] != self.source or answer[-1] != self.target or not _is_path(graph, answer):
+            return False
+        length = nx.shortest_path_length(graph, self.source, self.target, weight=self.weight)
+        return _path_weight(graph, answer, self.weight) == length
+
+
+class HamiltonianPath(Validator):
+    """Any path that visits every node exactly once.
+
+    Parameters
+    ----------
+    source : None | int
+        The first node of the path, if it is fixed.
+
+    target : None | int
+        The last node of the path, if it is fixed.
+
+    cycle : bool
+        Whether the path must return to its first node (which then appears at both ends of the answer).
+    """
+    question_types = ('QSelectPath',)
+    node_parameters = ('source', 'target')
+
+    def __init__(self, source=None, target=None, cycle=False):
+        self.source = source
+        self.target = target
+        self.cycle = cycle
+
+    def __call__(self, graph, answer):
+        answer = list(answer)
+        if self.cycle:
+            if len(answer) < 2 or answer[0] != answer[-1]:
+                return False
+            nodes = answer[:-1]
+        else:
+            nodes = answer
+        return (len(nodes) == len(set(nodes)) == graph.number_of_nodes() and _is_path(graph, answer) and
+                (self.source is None or answer[0] == self.source) and
+                (self.target is None or answer[-1] == self.target))
+
+
+class IndependentSet(Validator):
+    """Any independent set, i.e. a set of nodes of which no two are adjacent.
+
+    Parameters
+    ----------
+    k : None | int
+        The required size of the set, if any.
+    """
+    question_types = ('QVertexSet',)
+
+    def __init__(self, k=None):
+        self.k = k
+
+    def __call__(self, graph, answer):
+        nodes = set(answer)
+        return ((self.k is None or len(nodes) == self.k) and all(v in graph for v in nodes) and
+                not any(graph.has_edge(u, v) for u in nodes for v in nodes if u != v))
+
+
+class Clique(Validator):
+    """Any clique, i.e. a set of nodes that are all adjacent to each other.
+
+    Parameters
+    ----------
+    k : None | int
+        The required size of the set, if any.
+    """
+    question_types = ('QVertexSet',)
+
+    def __init__(self, k=None):
+        self.k = k
+
+    def __call__(self, graph, answer):
+        nodes = set(answer)
+        return ((self.k is None or len(nodes) == self.k) and all(v in graph for v in nodes) and
+                all(graph.has_edge(u, v) for u in nodes for v in nodes if u != v))
+
+
+class VertexCover(Validator):
+    """Any vertex cover, i.e. a set of nodes that includes an endpoint of every edge.
+
+    Parameters
+    ----------
+    k : None | int
+        The required size of the set, if any.
+    """
+    question_types = ('QVertexSet',)
+
+    def __init__(self, k=None):
+        self.k = k
+
+    def __call__(self, graph, answer):
+        nodes = set(answer)
+        return ((self.k is None or len(nodes) == self.k) and all(v in graph for v in nodes) and
+                all(u in nodes or v in nodes for u, v in graph.edges))
+
+
+class DominatingSet(Validator):
+    """Any dominating set, i.e. a set of nodes that every other node is adjacent to.
+
+    Parameters
+    ----------
+    k : None | int
+        The required size of the set, if any.
+    """
+    question_types = ('QVertexSet',)
+
+    def __init__(self, k=None):
+        self.k = k
+
+    def __call__(self, graph, answer):
+        nodes = set(answer)
+        return ((self.k is None or len(nodes) == self.k) and all(v in graph for v in nodes) and
+                nx.is_dominating_set(graph, nodes))
+
+
+class SpanningTree(Validator):
+    """Any spanning tree of a connected undirected graph.
+
+    Parameters
+    ----------
+    minimum : bool
+        Whether the tree must have the minimum total weight.
+
+    weight : str
+        The edge attribute holding the edge weights (a missing weight counts as 1).
+    """
+    question_types = ('QEdgeSet',)
+
+    def __init__(self, minimum=False, weight='weight'):
+        self.minimum = minimum
+        self.weight = weight
+
+    def __call__(self, graph, answer):
+        edges = _edge_set(graph, answer)
+        if edges is None or len(edges) != graph.number_of_nodes() - 1:
+            return False
+        tree = nx.Graph(list(edges))
+        tree.add_nodes_from(graph)
+        if not nx.is_tree(tree):
+            return False
+        if not self.minimum:
+            return True
+        total = sum(graph.edges[e].get(self.weight, 1) for e in edges)
+        best = nx.minimum_spanning_tree(graph, weight=self.weight).size(weight=self.weight)
+        return total == best
+
+
+class Matching(Validator):
+    """Any matching, i.e. a set of edges of which no two share an endpoint.
+
+    Parameters
+    ----------
+    k : None | int
+        The required number of edges, if any.
+    """
+    question_types = ('QEdgeSet',)
+
+    def __init__(self, k=None):
+        self.k = k
+
+    def __call__(self, graph, answer):
+        edges = _edge_set(graph, answer)
+        if edges is None or (self.k is not None and len(edges) != self.k):
+            return False
+        ends = [v for e in edges for v in e]
+        return len(ends) == len(set(ends))
+
+
+class PerfectMatching(Validator):
+    """Any perfect matching, i.e. a matching that covers every node."""
+    question_types = ('QEdgeSet',)
+
+    def __call__(self, graph, answer):
+        n = graph.number_of_nodes()
+        return n % 2 == 0 and Matching(n // 2)(graph, answer)
+
+
+class MaximumMatching(Validator):
+    """Any maximum (cardinality) matching, i.e. a matching with as many edges as possible."""
+    question_types = ('QEdgeSet',)
+
+    def __call__(self, graph, answer):
+        size = len(nx.max_weight_matching(graph, maxcardinality=True, weight=None))
+        return Matching(size)(graph, answer)
+
+
+def encode_solutions(solutions: list | None) -> list | None:
+    """Replaces the validators in a list of solutions with dictionaries, so it can be serialized."""
+    if solutions is None:
+        return None
+    return [solution.to_dict() if isinstance(solution, Validator) else solution for solution in solutions]
+
+
+def decode_solutions(solutions: list | None) -> list | None:
+    """Reverses `encode_solutions()`."""
+    if solutions is None:
+        return None
+    return [Validator.from_dict(solution) if isinstance(solution, dict) and 'validator' in solution else solution
+            for solution in solutions]
+
+
+class SolutionIndex:
+    """A hash index of a question instance's solutions.
+
+    For 'QVertexSet' and 'QEdgeSet', the nodes (or edges) that appear in the solutions are numbered,
+    and each solution is stored as a bitset: a Python int whose bit i is set if it contains element i.
+    Comparing an answer with the solutions then only takes integer operations.
+
+    Parameters
+    ----------
+    kind : str
+        The question type, e.g. 'QVertexSet'.
+
+    solutions : [any]
+        The solutions returned by `generate_solutions()`, which may include validators.
+        For 'QMultipleChoice', this is the list of options, which together form a single solution.
+
+    directed : bool
+        Whether the question's graph is directed.
+    """
+    def __init__(self, kind: str, solutions=(), directed=False):
+        self.kind = kind
+        self.directed = directed
+        if kind == 'QMultipleChoice':
+            solutions = [solutions]
+        self.validators = [solution for solution in solutions if isinstance(solution, Validator)]
+        listed = [canonical(kind, solution, directed) for solution in solutions
+                  if not isinstance(solution, Validator)]
+
+        self.elements = None
+        if kind in ('QVertexSet', 'QEdgeSet'):
+            self.elements = list(dict.fromkeys(element for key in listed for element in key))
+            self.__positions = {element: i for i, element in enumerate(self.elements)}
+            listed = [self.__bits(key)[0] for key in listed]
+        self.keys = set(listed)
+
+    @classmethod
+    def build(cls, question: Question, graphs: nx.Graph | list[nx.Graph], solutions: list):
+        """Build the index for a question instance."""
+        graph = _single_graph(graphs)
+        directed = graph is not None and graph.is_directed()
+        return cls(question_type(question), solutions, directed)
+
+    def __bits(self, key: frozenset) -> (int, int):
+        """Returns the bitset of a canonical vertex or edge set, and how many of its elements aren't numbered."""
+        bits = 0
+        unknown = 0
+        for element in key:
+            i = self.__positions.get(element)
+            if i is None:
+                unknown += 1
+            else:
+                bits |= 1 << i
+        return bits, unknown
+
+    def __key(self, answer):
+        """Returns the key of an answer, or None if it can't match any listed solution."""
+        try:
+            key = canonical(self.kind, answer, self.directed)
+        except (TypeError, ValueError):
+            # Malformed answers (e.g. an edge that isn't a pair) are never correct.
+            return None
+        if self.elements is None:
+            return key
+        bits, unknown = self.__bits(key)
+        return None if unknown else bits
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, answer) -> bool:
+        """Whether the answer is one of the listed solutions (validators aren't checked)."""
+        key = self.__key(answer)
+        return key is not None and key in self.keys
+
+    def distance(self, answer) -> int | None:
+        """How many nodes (or edges) must be added or removed to turn the answer into the closest listed solution.
+
+        Parameters
+        ----------
+        answer : [int] | [[int, int]]
+            The student's answer to a 'QVertexSet' or 'QEdgeSet' question.
+
+        Returns
+        -------
+        distance : None | int
+            The distance (0 if the answer is correct), or `None` if no solutions are listed.
+        """
+        assert self.elements is not None, 'distance() requires a QVertexSet or QEdgeSet question'
+        if not self.keys:
+            return None
+        bits, unknown = self.__bits(canonical(self.kind, answer, self.directed))
+        return unknown + min((bits ^ key).bit_count() for key in self.keys)
+
+    def partial(self, answer) -> bool:
+        """Whether the answer is part of a listed solution, i.e. it can be completed by adding nodes (or edges).
+
+        Parameters
+        ----------
+        answer : [int] | [[int, int]]
+            The student's answer to a 'QVertexSet' or 'QEdgeSet' question.
+
+        Returns
+        -------
+        partial : bool
+            Whether the answer is a subset of one of the listed solutions.
+        """
+        assert self.elements is not None, 'partial() requires a QVertexSet or QEdgeSet question'
+        bits, unknown = self.__bits(canonical(self.kind, answer, self.directed))
+        return not unknown and any(bits & key == bits for key in self.keys)
+
+    def accepts(self, answer, graphs: nx.Graph | list[nx.Graph] = None) -> bool:
+        """Verify an answer against the listed solutions, then the validators.
+
+        Parameters
+        ----------
+        answer : any
+            The student's answer.
+
+        graphs : networkx Graph | [networkx Graph]
+            The graphs used in the question (as returned by `generate_data()`), which the validators check
+            the answer against.
+
+        Returns
+        -------
+        correct : bool
+            Whether the answer is correct.
+        """
+        if answer in self:
+            return True
+        # Validators are only used by the question types with a single graph, which they are given directly.
+        graph = _single_graph(graphs)
+        for validator in self.validators:
+            try:
+                if validator(graphs if graph is None else graph, answer):
+                    return True
+            except (TypeError, ValueError, KeyError, nx.NetworkXException):
+                pass
+        return False
+
+    def to_dict(self) -> dict:
+        """Returns the index as a dictionary that can be stored with `serialize.dumps()`."""
+        data = {'kind': self.kind, 'directed': self.directed,
+                'validators': [validator.to_dict() for validator in self.validators]}
+        if self.elements is None:
+            data['keys'] = self.keys
+        else:
+            # Bitsets are stored in hexadecimal, since they may not fit in a 64-bit integer.
+            data['keys'] = [format(key, 'x') for key in self.keys]
+            data['elements'] = [list(e) if self.kind == 'QEdgeSet' else e for e in self.elements]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """Rebuilds an index from the dictionary returned by `to_dict()`."""
+        index = cls(data['kind'], [Validator.from_dict(validator) for validator in data['validators']],
+                    data['directed'])
+        if 'elements' in data:
+            index.elements = [tuple(e) if index.kind == 'QEdgeSet' else e for e in data['elements']]
+            index.__positions = {element: i for i, element in enumerate(index.elements)}
+            index.keys = {int(key, 16) for key in data['keys']}
+        else:
+            index.keys = set(data['keys'])
+        return index
+
+
+# Node attributes that only affect how a graph is drawn, so are ignored when comparing graphs
+__LAYOUT_ATTRIBUTES = {'x', 'y'}
+
+
+def __attributes(d: dict) -> dict:
+    return {k: v for k, v in d.items() if k not in __LAYOUT_ATTRIBUTES}
+
+
+def __label(d: dict) -> str:
+    return repr(sorted(__attributes(d).items(), key=repr))
+
+
+def graph_hash(G: nx.Graph) -> str:
+    """Returns a Weisfeiler-Lehman hash of a graph, including its node and edge attributes (except x and y).
+
+    Isomorphic graphs always have the same hash, but graphs with the same hash aren't necessarily isomorphic.
+    """
+    H = nx.DiGraph() if G.is_directed() else nx.Graph()
+    H.add_nodes_from((v, {'label': __label(d)}) for v, d in G.nodes(data=True))
+    H.add_edges_from((u, v, {'label': __label(d)}) for u, v, d in G.edges(data=True))
+    return nx.weisfeiler_lehman_graph_hash(H, node_attr='label', edge_attr='label')
+
+
+def _isomorphism(G: nx.Graph, H: nx.Graph) -> dict | None:
+    """Returns an isomorphism from H to G that preserves node and edge attributes (except x and y), if any."""
+    if G.is_directed() != H.is_directed() or G.number_of_edges() != H.number_of_edges():
+        return None
+    matcher = nx.isomorphism.DiGraphMatcher if G.is_directed() else nx.isomorphism.GraphMatcher
+    match = matcher(H, G, node_match=lambda a, b: __attributes(a) == __attributes(b),
+                    edge_match=lambda a, b: a == b)
+    return next(match.isomorphisms_iter(), None)
+
+
+# The question types whose solutions are made of nodes, and must be relabelled for isomorphic graphs
+_NODE_TYPES = ('QSelectPath', 'QVertexSet', 'QEdgeSet')
+
+
+def _relabel(kind: str, solutions: list, mapping: dict) -> list:
+    """Relabels the nodes in a list of solutions."""
+    result = []
+    for solution in solutions:
+        if isinstance(solution, Validator):
+            solution = solution.relabel(mapping)
+        elif kind in ('QSelectPath', 'QVertexSet'):
+            solution = [mapping[v] for v in solution]
+        elif kind == 'QEdgeSet':
+            solution = [[mapping[u], mapping[v]] for u, v in solution]
+        result.append(solution)
+    return result
+
+
+class SolutionCache:
+    """A cache of the solutions generated for graphs, shared between question instances.
+
+    Solutions are cached per question class and `data` setting, and are reused for any isomorphic graphs
+    (with equal node and edge attributes, except x and y), after their nodes are relabelled.
+    Only question classes that set `cache_solutions = True` are cached:
+    their `generate_solutions()` method must only depend on the graphs and the `data` setting,
+    and any solutions that aren't nodes, edges or validators (i.e. text and multiple choice solutions)
+    must not refer to particular nodes. Paths, vertex sets and edge sets are only cached for questions with one graph.
+
+    Parameters
+    ----------
+    capacity : int
+        The maximum number of graphs to cache solutions for. The least recently used are evicted first.
+
+    path : None | str
+        The path of an SQLite database to store the cache in, so it persists and can be shared between processes.
+        If `None`, the cache is only kept in memory.
+
+    Attributes
+    ----------
+    hits : int
+        The number of lookups that found cached solutions.
+
+    misses : int
+        The number of lookups that didn't.
+    """
+    def __init__(self, capacity=1024, path=None):
+        assert capacity > 0, 'capacity must be positive'
+        self.capacity = capacity
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+        self.__size = 0
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+        if path is not None:
+            with self.__connect() as connection:
+                connection.execute('CREATE TABLE IF NOT EXISTS solutions '
+                                   '(id INTEGER PRIMARY KEY, key TEXT, entry BLOB, used REAL)')
+                connection.execute('CREATE INDEX IF NOT EXISTS solutions_key ON solutions (key)')
+
+    def __connect(self) -> sqlite3.Connection:
+        # Connections can't be shared between threads, so each thread opens its own.
+        connection = getattr(self.__local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=60)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self.__local.connection = connection
+        return connection
+
+    @staticmethod
+    def applies(question: Question, graphs: nx.Graph | list[nx.Graph]) -> bool:
+        """Whether a question instance's solutions can be cached."""
+        if not getattr(question, 'cache_solutions', False):
+            return False
+        # Paths, vertex sets and edge sets are relabelled through the isomorphism of a single graph.
+        if question_type(question) in _NODE_TYPES and _single_graph(graphs) is None:
+            return False
+        graphs = [graphs] if isinstance(graphs, nx.Graph) else graphs
+        return not any(G.is_multigraph() for G in graphs)
+
+    @staticmethod
+    def __key(question: Question, graphs: list[nx.Graph]) -> str:
+        cls = type(question)
+        data = json.dumps(question.data, sort_keys=True, default=repr)
+        return '|'.join([f'{cls.__module__}:{cls.__qualname__}', data, *map(graph_hash, graphs)])
+
+    def __candidates(self, question: Question, key: str) -> list:
+        """Returns the cached (database row, graphs, solutions) for a key, most recently used first."""
+        with self.__lock:
+            if key in self.__entries:
+                self.__entries.move_to_end(key)
+                return [(None, graphs, solutions) for graphs, solutions in self.__entries[key]]
+        if self.path is None:
+            return []
+
+        with self.__connect() as connection:
+            rows = connection.execute('SELECT id, entry FROM solutions WHERE key = ? ORDER BY used DESC',
+                                      (key,)).fetchall()
+        candidates = []
+        for row_id, entry in rows:
+            _, graphs, fields = serialize.loads(entry, type(question))
+            graphs = [graphs] if isinstance(graphs, nx.Graph) else graphs
+            candidates.append((row_id, graphs, decode_solutions(fields['solutions'])))
+        return candidates
+
+    def __remember(self, key: str, graphs: list[nx.Graph], solutions: list):
+        """Add an entry to the in-memory cache."""
+        with self.__lock:
+            self.__entries.setdefault(key, []).insert(0, (graphs, solutions))
+            self.__entries.move_to_end(key)
+            self.__size += 1
+            while self.__size > self.capacity:
+                oldest = next(iter(self.__entries))
+                self.__entries[oldest].pop()
+                self.__size -= 1
+                if not self.__entries[oldest]:
+                    del self.__entries[oldest]
+
+    def get(self, question: Question, graphs: nx.Graph | list[nx.Graph]) -> list | None:
+        """Look up the solutions for a question instance.
+
+        Parameters
+        ----------
+        question : Question
+            The question object.
+
+        graphs : networkx Graph | [networkx Graph]
+            The graphs returned by its `generate_data()` method.
+
+        Returns
+        -------
+        solutions : None | list[any]
+            The cached solutions, relabelled for these graphs, or `None` if there are none.
+        """
+        graphs = [graphs] if isinstance(graphs, nx.Graph) else list(graphs)
+        key = self.__key(question, graphs)
+        for row_id, cached, solutions in self.__candidates(question, key):
+            mappings = [_isomorphism(G, H) for G, H in zip(graphs, cached)]
+            if any(mapping is None for mapping in mappings):
+                continue
+            if row_id is not None:
+                self.__remember(key, cached, solutions)
+                with self.__connect() as connection:
+                    connection.execute('UPDATE solutions SET used = ? WHERE id = ?', (time.time(), row_id))
+            with self.__lock:
+                self.hits += 1
+            # Text and multiple choice solutions don't refer to nodes (see the class docstring), so aren't relabelled.
+            kind = question_type(question)
+            return _relabel(kind, solutions, mappings[0]) if kind in _NODE_TYPES else solutions
+        with self.__lock:
+            self.misses += 1
+        return None
+
+    def put(self, question: Question, graphs: nx.Graph | list[nx.Graph], solutions: list):
+        """Cache the solutions for a question instance.
+
+        Parameters
+        ----------
+        question : Question
+            The question object.
+
+        graphs : networkx Graph | [networkx Graph]
+            The graphs returned by its `generate_data()` method, which must not be modified afterwards
+            (e.g. because they are frozen).
+
+        solutions : list[any]
+            The solutions returned by its `generate_solutions()` method.
+        """
+        listed = [graphs] if isinstance(graphs, nx.Graph) else list(graphs)
+        key = self.__key(question, listed)
+        self.__remember(key, listed, solutions)
+
+        if self.path is not None:
+            entry = serialize.dumps(question, graphs, binary=True, solutions=encode_solutions(solutions))
+            with self.__connect() as connection:
+                connection.execute('INSERT INTO solutions (key, entry, used) VALUES (?, ?, ?)',
+                                   (key, entry, time.time()))
+                connection.execute('DELETE FROM solutions WHERE id IN (SELECT id FROM solutions ORDER BY used DESC '
+                                   'LIMIT -1 OFFSET ?)', (self.capacity,))
@@ -6,7 +6,9 @@ import random
 
 # Swap the comment round for these lines when in development vs deployment
 #from src.graphquest.question import Question
+from graphquest import lifecycle
 from graphquest.question import Question
+from graphquest.solutions import Validator
 
 import string
 
@@ -110,7 +112,9 @@ def __random_string():
 
 
 def __validate_solution_type(sol, q_type):
-    if q_type == 'QTextInput':
+    if isinstance(sol, Validator):
+        assert q_type in sol.question_types, f'{type(sol).__name__} cannot be used as a solution for {q_type}'
+    elif q_type == 'QTextInput':
         assert isinstance(sol, str), 'generate_solutions() must return a list[str]'
     elif q_type == 'QMultipleChoice':
         assert isinstance(sol, list), 'generate_solutions() must return a list[list[str, bool]]'
@@ -221,6 +225,9 @@ def __validate_question(q):
     else:
         assert isinstance(gs, nx.Graph), 'generate_data() must return a networkx.Graph'
 
+    # The methods are given views of the graphs, as in the question lifecycle.
+    gs = lifecycle.view(lifecycle.freeze(gs))
+
     if verbose:
         print('pass!')
         print('\tTesting generate_question()...', end='\t')
@@ -0,0 +1,112 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import networkx as nx
+
+from graphquest import aio
+from graphquest.question import QVertexSet
+
+
+class HighlightQuestion(QVertexSet):
+    def __init__(self):
+        super().__init__(feedback=True)
+
+    def generate_data(self):
+        return [nx.path_graph(3)]
+
+    def generate_question(self, graphs):
+        return f'Select the centre of the path ({threading.current_thread().name}).'
+
+    def generate_solutions(self, graphs):
+        return [[1]]
+
+    def generate_feedback(self, graphs, answer):
+        self.highlighted_nodes = [1]
+        return list(answer) == [1], 'The centre is 1.'
+
+
+class SlowQuestion(QVertexSet):
+    delay = 0.1
+    lock = threading.Lock()
+    running = 0
+    most = 0
+
+    def generate_data(self):
+        cls = type(self)
+        with cls.lock:
+            cls.running += 1
+            cls.most = max(cls.most, cls.running)
+        time.sleep(self.delay)
+        with cls.lock:
+            cls.running -= 1
+        return [nx.path_graph(3)]
+
+    def generate_question(self, graphs):
+        return 'Select the centre of the path.'
+
+    def generate_solutions(self, graphs):
+        return [[1]]
+
+    def generate_feedback(self, graphs, answer):
+        pass
+
+
+def test_generate_and_grade_without_blocking_the_loop():
+    async def main():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        ticker = asyncio.create_task(tick())
+        instances = await asyncio.gather(*(aio.generate(SlowQuestion) for _ in range(3)))
+        ticker.cancel()
+        assert ticks > 5
+        assert [await aio.grade(instance, [1]) for instance in instances] == [(True, '')] * 3
+        assert await aio.grade(instances[0], [0]) == (False, '')
+
+        instance = await aio.generate(HighlightQuestion)
+        assert 'graphquest' in instance.description
+        assert instance.question.highlighted_nodes is None
+        assert await aio.grade(instance, [1]) == (True, 'The centre is 1.')
+        assert instance.question.highlighted_nodes == [1]
+
+        with concurrent.futures.ThreadPoolExecutor(thread_name_prefix='custom') as executor:
+            instance = await aio.generate(HighlightQuestion, executor=executor)
+        assert 'custom' in instance.description
+
+    asyncio.run(main())
+
+
+def test_limit_and_timeout():
+    async def main():
+        SlowQuestion.most = 0
+        await asyncio.gather(*(aio.generate(SlowQuestion) for _ in range(4)))
+        assert SlowQuestion.most > 1
+
+        aio.set_limit(SlowQuestion, 1)
+        try:
+            SlowQuestion.most = 0
+            await asyncio.gather(*(aio.generate(SlowQuestion) for _ in range(3)))
+            assert SlowQuestion.most == 1
+
+            # A call that times out keeps its slot until its method finishes in the background.
+            try:
+                await aio.generate(SlowQuestion, timeout=0.02)
+            except asyncio.TimeoutError:
+                pass
+            else:
+                assert False, 'the call did not time out'
+            start = time.monotonic()
+            await aio.generate(SlowQuestion)
+            assert time.monotonic() - start > 1.5 * SlowQuestion.delay
+            assert SlowQuestion.most == 1
+        finally:
+            aio.set_limit(SlowQuestion, None)
+
+    asyncio.run(main())
@@ -0,0 +1,34 @@
+import json
+import pathlib
+import subprocess
+import sys
+
+from graphquest import graph
+
+SCRIPT = pathlib.Path(__file__).parent.parent / 'benchmarks' / 'bench_random_planar_graph.py'
+
+
+def run(tmp_path, *args):
+    output = tmp_path / 'results.json'
+    subprocess.run([sys.executable, str(SCRIPT), '--n', '10', '40', '--s', '0.0', '1.0', '--seeds', '0', '--no-memory',
+                    '--output', str(output), *args], check=True, capture_output=True)
+    return json.loads(output.read_text())['results']
+
+
+def test_greedy_benchmark_accounts_for_every_candidate(tmp_path):
+    results = run(tmp_path)
+    assert len(results) == 8
+    for r in results:
+        G = graph.random_planar_graph(r['n'], connected=r['connected'], s=r['s'], seed=r['seed'])
+        assert r['accepted'] == G.number_of_edges()
+        assert r['rejected'] == r['candidates'] - r['accepted'] == r['rejected_crossing'] + r['rejected_angle']
+        assert r['screened_ahead'] >= 0
+        assert r['candidates'] + r['screened_ahead'] <= r['n'] * (r['n'] - 1) // 2
+        assert r['is_connected'] or not r['connected']
+
+
+
+def test_delaunay_benchmark_counts_the_triangulation(tmp_path):
+    for r in run(tmp_path, '--method', 'delaunay', '--connected', 'true'):
+        assert r['candidates'] >= r['accepted'] >= r['n'] - 1
+        assert r['rejected_crossing'] is None and r['rejected_angle'] is None and r['screened_ahead'] is None
@@ -0,0 +1,82 @@
+import pickle
+import time
+
+import networkx as nx
+import pytest
+
+from graphquest import budget
+from graphquest.question import QVertexSet
+
+
+class CentreQuestion(QVertexSet):
+    work = None
+
+    def generate_data(self):
+        if self.work == 'sleep':
+            time.sleep(10)
+        elif self.work == 'spin':
+            while True:
+                pass
+        elif self.work == 'allocate':
+            return [bytearray(1 << 30)]
+        elif self.work == 'fail':
+            raise ValueError('no graph')
+        return [nx.path_graph(3)]
+
+    def generate_question(self, graphs):
+        return 'Select the centre of the path.'
+
+    def generate_solutions(self, graphs):
+        return [[1]]
+
+    def generate_feedback(self, graphs, answer):
+        time.sleep(10)
+
+
+class SleepingQuestion(CentreQuestion):
+    work = 'sleep'
+
+
+class SpinningQuestion(CentreQuestion):
+    work = 'spin'
+
+
+class AllocatingQuestion(CentreQuestion):
+    work = 'allocate'
+
+
+class FailingQuestion(CentreQuestion):
+    work = 'fail'
+
+
+class FeedbackQuestion(CentreQuestion):
+    def __init__(self):
+        super().__init__(feedback=True)
+
+
+def test_stages_that_overrun_their_budget_are_stopped():
+    budgets = {'generate_data': budget.Budget(wall=0.5, cpu=0.2, memory=256 << 20),
+               'generate_feedback': budget.Budget(wall=0.2)}
+    with budget.Supervisor(budgets, max_tasks=None) as supervisor:
+        for cls, resource in [(SleepingQuestion, 'wall'), (SpinningQuestion, 'cpu'), (AllocatingQuestion, 'memory')]:
+            start = time.monotonic()
+            with pytest.raises(budget.BudgetExceeded) as info:
+                supervisor.generate(cls)
+            assert (info.value.stage, info.value.resource) == ('generate_data', resource)
+            assert time.monotonic() - start < 5
+            # The worker is replaced, and the next question is generated as usual.
+            instance = supervisor.generate(CentreQuestion)
+            assert supervisor.grade(instance, [1]) == (True, '')
+
+        with pytest.raises(ValueError, match='no graph'):
+            supervisor.generate(FailingQuestion)
+        instance = supervisor.generate(FeedbackQuestion)
+        with pytest.raises(budget.BudgetExceeded) as info:
+            supervisor.grade(instance, [1])
+        assert (info.value.stage, info.value.resource, info.value.limit) == ('generate_feedback', 'wall', 0.2)
+
+
+def test_budget_exceeded_can_be_pickled():
+    error = pickle.loads(pickle.dumps(budget.BudgetExceeded('generate_data', 'cpu', 0.5, 0.75)))
+    assert (error.stage, error.resource, error.limit, error.used) == ('generate_data', 'cpu', 0.5, 0.75)
+    assert str(error) == 'generate_data exceeded its cpu budget of 0.5 (used 0.75)'
@@ -0,0 +1,258 @@
+import itertools
+import pickle
+
+import networkx as nx
+import numpy as np
+import pytest
+from shapely import LineString
+
+from graphquest import graph
+
+
+def test_force_directed_layout_does_not_stack_nodes():
+    G = graph.force_directed_layout(nx.grid_2d_graph(20, 20), seed=1)
+    xy = np.array([(d['x'], d['y']) for _, d in G.nodes(data=True)])
+    assert len(np.unique(xy.round(6), axis=0)) == G.number_of_nodes()
+    assert xy.min() >= 0 and xy.max() <= 100
+    on_frame = ((xy < 0.5) | (xy > 99.5)).any(axis=1)
+    assert on_frame.sum() < 20
+
+
+def test_graph_pool_reopens_a_replaced_generation(tmp_path, monkeypatch):
+    reader = graph.GraphPool(str(tmp_path), capacity=3, processes=1)
+    writer = graph.GraphPool(str(tmp_path), capacity=3, processes=1)
+    writer.refill(8)
+    load = np.load
+
+    # The reader has read CURRENT, but a refill deletes the generation it names before it is loaded.
+    def stale_load(*args, **kwargs):
+        monkeypatch.setattr(np, 'load', load)
+        writer.refill(8)
+        return load(*args, **kwargs)
+
+    monkeypatch.setattr(np, 'load', stale_load)
+    assert reader.count(8) == 3
+
+
+def test_random_planar_graph_has_no_crossing_edges():
+    G = graph.random_planar_graph(150, s=0.5, seed=3)
+    lines = {(u, v): LineString([(G.nodes[u]['x'], G.nodes[u]['y']), (G.nodes[v]['x'], G.nodes[v]['y'])])
+             for u, v in G.edges}
+    edges = list(lines)
+    for i, e in enumerate(edges):
+        for f in edges[i + 1:]:
+            if not set(e) & set(f):
+                assert not lines[e].intersects(lines[f])
+    assert nx.is_connected(G)
+
+
+def test_dense_node_positions_match_rejection_sampling():
+    # With 150 nodes, any two distinct lattice points are far enough apart, so only repeats are rejected.
+    rng = np.random.default_rng(5)
+    expected = []
+    while len(expected) < 150:
+        for x, y in rng.integers(0, 101, size=(150, 2)).tolist():
+            if (x, y) not in expected and len(expected) < 150:
+                expected.append((x, y))
+    G = graph.random_planar_graph(150, seed=5)
+    assert sorted((d['x'], d['y']) for _, d in G.nodes(data=True)) == sorted(expected)
+
+
+def test_random_planar_graph_accepts_numpy_edge_counts():
+    G = graph.random_planar_graph(12, seed=2, m=np.int64(15))
+    assert G.number_of_edges() == 15
+    G = graph.random_planar_graph(12, seed=2, m=(np.int32(11), np.uint8(13)))
+    assert 11 <= G.number_of_edges() <= 13
+
+
+def test_random_planar_graph_places_nodes_on_the_chosen_canvas():
+    G = graph.random_planar_graph(30, seed=1, canvas=(40, 10), integral=False)
+    assert all(type(d['x']) is float and 0 <= d['x'] <= 40 and 0 <= d['y'] <= 10 for _, d in G.nodes(data=True))
+
+    # The default canvas has fewer lattice points than nodes, but a canvas scaled to n has room for them.
+    with pytest.raises(ValueError):
+        graph.random_planar_graph(12000, s=0.0, seed=1, method='delaunay')
+    G = graph.random_planar_graph(12000, s=0.0, seed=1, method='delaunay', canvas='scaled')
+    assert G.number_of_nodes() == 12000
+    assert max(max(d['x'], d['y']) for _, d in G.nodes(data=True)) <= 100 * np.sqrt(120)
+
+
+def test_compact_graphs_keep_integer_coordinates(tmp_path):
+    G = graph.random_planar_graph(30, seed=5)
+    H = graph.random_planar_graph(30, seed=5, compact=True).to_networkx()
+    assert list(H.nodes(data=True)) == list(G.nodes(data=True))
+    assert all(type(d['x']) is int and type(d['y']) is int for _, d in H.nodes(data=True))
+    F = graph.random_planar_graph(30, seed=5, compact=True, integral=False).to_networkx()
+    assert all(type(d['x']) is float for _, d in F.nodes(data=True))
+
+    pool = graph.GraphPool(str(tmp_path), capacity=2, processes=1)
+    pool.refill(12)
+    P = pool.get(12, seed=0)
+    assert all(type(d['x']) is int and type(d['y']) is int for _, d in P.nodes(data=True))
+
+
+def test_segment_predicates_match_shapely():
+    # Points on a small lattice make collinear, touching and overlapping segments common.
+    # Zero-length segments are left out, since shapely treats them as degenerate and nodes never coincide.
+    rng = np.random.default_rng(0)
+    a, b, c, d = rng.integers(0, 5, size=(4, 2000, 2)).astype(float)
+    proper = (a != b).any(axis=1) & (c != d).any(axis=1)
+    a, b, c, d = a[proper], b[proper], c[proper], d[proper]
+    expected = [LineString([p, q]).intersects(LineString([r, t])) for p, q, r, t in zip(a, b, c, d)]
+    assert graph._intersects(a, b, c, d).tolist() == expected
+
+    xy = np.stack(np.divmod(rng.choice(400, 30, replace=False), 20), axis=1).astype(float)
+    pairs = np.array([(u, v) for u in range(30) for v in range(u + 1, 30)])
+    segments = graph._SegmentSet()
+    recorded = pairs[rng.choice(len(pairs), 20, replace=False)]
+    for u, v in recorded:
+        segments.add((u, v), xy[u], xy[v])
+    expected = [any(not {u, v} & {w, z} and LineString([xy[u], xy[v]]).intersects(LineString([xy[w], xy[z]]))
+                    for w, z in recorded) for u, v in pairs]
+    assert segments.crossing(pairs, xy[pairs[:, 0]], xy[pairs[:, 1]]).tolist() == expected
+    assert [segments.crosses((u, v), xy[u], xy[v]) for u, v in pairs] == expected
+
+
+def test_random_planar_graph_meets_its_component_bound():
+    dsu = graph._DisjointSet(6)
+    for u, v in [(0, 1), (2, 3), (1, 0), (3, 1)]:
+        dsu.union(u, v)
+    assert dsu.components == 3
+    assert dsu.find(0) == dsu.find(2) != dsu.find(4)
+
+    for seed in range(5):
+        assert nx.is_connected(graph.random_planar_graph(40, s=0.0, seed=seed))
+        G = graph.random_planar_graph(40, s=0.0, components=4, seed=seed)
+        assert G.number_of_nodes() == 40 and nx.number_connected_components(G) <= 4
+
+
+def test_candidate_edges_are_streamed_nearest_first():
+    # Lattice points have many pairs at equal distances, which keep the order of nx.complete_graph's edges.
+    rng = np.random.default_rng(4)
+    xy = np.stack(np.divmod(rng.choice(100, 60, replace=False), 10), axis=1).astype(float)
+    expected = sorted(nx.complete_graph(60).edges, key=lambda e: ((xy[e[0]] - xy[e[1]]) ** 2).sum())
+    candidates = graph.__candidate_edges(xy)
+    assert list(itertools.islice(candidates, 10)) == expected[:10]
+    assert list(candidates) == expected[10:]
+    assert list(graph.__candidate_edges(xy[:1])) == []
+
+
+def test_angular_index_admits_only_edges_clear_of_the_tolerance():
+    rng = np.random.default_rng(6)
+    tolerance = np.pi / 12
+    index = graph._AngularIndex()
+    origin = (0.0, 0.0)
+    angles = rng.uniform(-np.pi, np.pi, 8)
+    for v, angle in enumerate(angles.tolist(), 1):
+        index.add(0, v, origin, (np.cos(angle), np.sin(angle)))
+    assert index.rotation(0) == (np.argsort(angles) + 1).tolist()
+    assert index.rotation(3) == [0]
+    for angle in rng.uniform(-np.pi, np.pi, 200).tolist():
+        gaps = np.abs((angles - angle + np.pi) % (2 * np.pi) - np.pi)
+        assert index.admits(0, origin, (np.cos(angle), np.sin(angle)), tolerance) == (gaps.min() > tolerance)
+
+    G = graph.random_planar_graph(80, s=1.0, seed=6)
+    for v in G:
+        p = np.array([G.nodes[v]['x'], G.nodes[v]['y']])
+        directions = [np.array([G.nodes[w]['x'], G.nodes[w]['y']]) - p for w in G[v]]
+        for i, a in enumerate(directions):
+            for b in directions[i + 1:]:
+                assert np.arccos(np.clip(a @ b / np.hypot(*a) / np.hypot(*b), -1, 1)) > np.pi / 12
+
+
+def test_batches_do_not_depend_on_the_number_of_processes():
+    def key(G):
+        return list(G.nodes(data=True)), list(G.edges)
+
+    serial = [key(G) for G in graph.random_planar_graphs(6, 20, seed=7, processes=1)]
+    assert [key(G) for G in graph.random_planar_graphs(6, 20, seed=7, processes=2, ordered=True)] == serial
+    unordered = [key(G) for G in graph.random_planar_graphs(6, 20, seed=7, processes=2, chunksize=2)]
+    assert sorted(map(repr, unordered)) == sorted(map(repr, serial))
+    assert len({repr(k) for k in serial}) == 6
+    trees = list(graph.batch(graph.random_tree, 3, seed=7, processes=1, n=10))
+    assert all(nx.is_tree(T) for T in trees)
+    assert list(graph.random_planar_graphs(0, 20, processes=2)) == []
+
+
+def test_generators_are_reproducible_from_a_seed():
+    def key(G):
+        return list(G.nodes(data=True)), list(G.edges)
+
+    generators = [lambda seed: graph.random_planar_graph(25, seed=seed),
+                  lambda seed: graph.random_planar_graph(25, seed=seed, compact=True).to_networkx(),
+                  lambda seed: graph.random_planar_graph(25, connected=False, seed=seed, m=20)]
+    state = np.random.get_state()[1].copy()
+    for generate in generators:
+        assert key(generate(8)) == key(generate(8))
+        rng, again = np.random.default_rng(8), np.random.default_rng(8)
+        first, second = generate(rng), generate(rng)
+        assert key(first) != key(second)
+        assert [key(generate(again)), key(generate(again))] == [key(first), key(second)]
+    # The global random state is left alone.
+    assert (np.random.get_state()[1] == state).all()
+
+
+def test_compact_graph_stores_the_adjacency_in_csr_form():
+    G = graph.random_planar_graph(40, s=0.5, seed=9)
+    C = graph.CompactGraph.from_networkx(G)
+    assert (C.number_of_nodes(), C.number_of_edges()) == (40, G.number_of_edges())
+    for i, v in enumerate(C.nodes.tolist()):
+        assert sorted(C.nodes[C.indices[C.indptr[i]:C.indptr[i + 1]]].tolist()) == sorted(G[v])
+    assert sorted(map(sorted, C.nodes[C.edges()].tolist())) == sorted(map(sorted, G.edges))
+
+    H = pickle.loads(pickle.dumps(C)).to_networkx()
+    assert list(H.nodes(data=True)) == list(G.nodes(data=True))
+    assert sorted(map(sorted, H.edges)) == sorted(map(sorted, G.edges))
+    with pytest.raises(AttributeError):
+        C.nodes = C.nodes[::-1]
+    with pytest.raises(ValueError):
+        C.xy[0, 0] = 1
+
+
+def test_delaunay_method_generates_planar_graphs():
+    for s in (0.0, 0.5, 1.0):
+        G = graph.random_planar_graph(120, s=s, seed=11, method='delaunay')
+        assert G.number_of_nodes() == 120 and nx.is_connected(G)
+        lines = {(u, v): LineString([(G.nodes[u]['x'], G.nodes[u]['y']), (G.nodes[v]['x'], G.nodes[v]['y'])])
+                 for u, v in G.edges}
+        edges = list(lines)
+        for i, e in enumerate(edges):
+            for f in edges[i + 1:]:
+                if not set(e) & set(f):
+                    assert not lines[e].intersects(lines[f])
+        if s == 0.0:
+            assert nx.is_tree(G)
+    F = graph.random_planar_graph(120, connected=False, s=0.0, seed=11, method='delaunay')
+    assert F.number_of_nodes() == 120 and F.number_of_edges() == 0
+    assert graph.random_planar_graph(120, s=1.0, seed=11, method='delaunay').number_of_edges() > 2 * 120
+
+
+def test_geometric_generators_have_their_structure():
+    for n in (0, 1, 2, 30):
+        T = graph.random_tree(n, seed=14)
+        assert T.number_of_nodes() == n and (n == 0 or nx.is_tree(T))
+    T = graph.random_tree(30, root=4, seed=14)
+    depth = nx.single_source_shortest_path_length(T, 4)
+    assert all(T.nodes[v]['y'] < T.nodes[w]['y'] for v in T for w in T if depth[v] < depth[w])
+
+    B = graph.random_bipartite_graph(5, 8, p=0.4, seed=14)
+    assert all(B.nodes[u]['bipartite'] != B.nodes[v]['bipartite'] for u, v in B.edges)
+    assert [B.nodes[v]['bipartite'] for v in B] == [0] * 5 + [1] * 8
+    assert graph.random_bipartite_graph(5, 8, p=1.0, seed=14).number_of_edges() == 40
+
+    D = graph.random_planar_dag(40, s=0.5, seed=14)
+    assert nx.is_directed_acyclic_graph(D) and D.number_of_nodes() == 40
+    assert all((D.nodes[u]['x'], D.nodes[u]['y']) <= (D.nodes[v]['x'], D.nodes[v]['y']) for u, v in D.edges)
+
+    R = graph.random_grid_graph(5, 7, p=0.2, seed=14)
+    grid = nx.relabel_nodes(nx.grid_2d_graph(5, 7), lambda v: v[0] * 7 + v[1])
+    assert nx.is_connected(R) and all(grid.has_edge(u, v) for u, v in R.edges)
+    assert graph.random_grid_graph(5, 7, p=0.0, connected=False, seed=14).number_of_edges() == 0
+
+    def key(G):
+        return list(G.nodes(data=True)), list(G.edges)
+
+    for generate in (graph.random_tree, graph.random_planar_dag):
+        assert key(generate(20, seed=3)) == key(generate(20, seed=3))
+    assert key(graph.random_bipartite_graph(4, 6, seed=3)) == key(graph.random_bipartite_graph(4, 6, seed=3))
+    assert key(graph.random_grid_graph(4, 6, seed=3)) == key(graph.random_grid_graph(4, 6, seed=3))
@@ -0,0 +1,178 @@
+import random
+import time
+
+import networkx as nx
+
+from graphquest import budget, lifecycle, solutions
+from graphquest.question import QSelectPath, QTextInput, memoize
+
+
+class ShortestPathQuestion(QSelectPath):
+    def generate_data(self):
+        return [nx.path_graph(4)]
+
+    def generate_question(self, graphs):
+        return 'Find a shortest path from 0 to 3.'
+
+    def generate_solutions(self, graphs):
+        return [solutions.ShortestPath(0, 3)]
+
+    def generate_feedback(self, graphs, answer):
+        return True, ''
+
+
+def test_validator_accepts_correct_answer():
+    instance = lifecycle.generate(ShortestPathQuestion)
+    assert lifecycle.grade(instance, [0, 1, 2, 3]) == (True, '')
+    assert lifecycle.grade(instance, [0, 1, 2]) == (False, '')
+
+
+def test_validator_accepts_correct_answer_after_loading():
+    instance = lifecycle.generate(ShortestPathQuestion)
+    instance = lifecycle.Instance.loads(instance.dumps(), ShortestPathQuestion)
+    assert lifecycle.grade(instance, [0, 1, 2, 3]) == (True, '')
+
+
+def test_view_copies_graph_on_attribute_write():
+    G = lifecycle.freeze(nx.path_graph(3))
+    view = lifecycle.view(G)
+    nodes = view.nodes
+    nodes[0]['color'] = 'red'
+    nodes[1]['color'] = 'blue'
+    nx.set_node_attributes(view, {2: 'green'}, 'color')
+    view[0][1]['weight'] = 2
+    assert dict(view.nodes(data='color')) == {0: 'red', 1: 'blue', 2: 'green'}
+    assert view.edges[1, 0] == {'weight': 2}
+    assert dict(G.nodes(data='color')) == {0: None, 1: None, 2: None}
+    assert G.edges[0, 1] == {}
+
+
+class SizeQuestion(ShortestPathQuestion):
+    def generate_question(self, graphs):
+        G = graphs[0]
+        return f'{len(G.nodes)} nodes and {len(G.edges)} edges'
+
+
+def test_unmodified_view_supports_repeated_accessors_and_algorithms():
+    assert lifecycle.generate(SizeQuestion).description == '4 nodes and 3 edges'
+
+    G = lifecycle.freeze(nx.path_graph(4))
+    view = lifecycle.view(G)
+    assert list(view.nodes) == [0, 1, 2, 3]
+    assert list(view.edges) == [(0, 1), (1, 2), (2, 3)]
+    assert dict(view.adj[1]) == {0: {}, 2: {}}
+    assert view[2][3] == {} and view.get_edge_data(0, 1) == {}
+    assert nx.shortest_path(view, 0, 3) == [0, 1, 2, 3]
+    assert sorted(nx.minimum_spanning_tree(view).edges) == [(0, 1), (1, 2), (2, 3)]
+    assert set(nx.greedy_color(view).values()) == {0, 1}
+    assert list(nx.relabel_nodes(view, str)) == ['0', '1', '2', '3']
+    assert view.__dict__.get('_shared')
+
+
+class EdgeCountQuestion(QTextInput):
+    def __init__(self):
+        super().__init__(feedback=True)
+        self.calls = 0
+
+    @memoize
+    def edges(self, G, scale=1):
+        self.calls += 1
+        return G.number_of_edges() * scale
+
+    def generate_data(self):
+        return [nx.path_graph(3), nx.complete_graph(3)]
+
+    def generate_question(self, graphs):
+        return f'{[self.edges(G) for G in graphs]} {self.edges(graphs[1], scale=2)}'
+
+    def generate_solutions(self, graphs):
+        return []
+
+    def generate_feedback(self, graphs, answer):
+        return [self.edges(G) for G in graphs] == [2, 3], ''
+
+
+def test_memoize_tells_graphs_and_keyword_arguments_apart():
+    instance = lifecycle.generate(EdgeCountQuestion)
+    assert instance.description == '[2, 3] 6'
+    assert lifecycle.grade(instance, '') == (True, '')
+    assert instance.question.calls == 3
+
+    try:
+        EdgeCountQuestion().edges(nx.path_graph(3))
+    except TypeError:
+        pass
+    else:
+        assert False, 'a graph that was not passed to the question was accepted'
+
+
+class FailingQuestion(ShortestPathQuestion):
+    def generate_data(self):
+        raise RuntimeError('no graph')
+
+
+def wait_until(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def test_question_pool_serves_pregenerated_instances():
+    with lifecycle.QuestionPool({ShortestPathQuestion: 3, FailingQuestion: 1}, workers=2) as pool:
+        wait_until(lambda: pool.stats()[ShortestPathQuestion]['ready'] == 3)
+        instance = pool.get(ShortestPathQuestion)
+        assert lifecycle.grade(instance, [0, 1, 2, 3]) == (True, '')
+        assert isinstance(pool.pop(ShortestPathQuestion), bytes)
+        wait_until(lambda: pool.stats()[FailingQuestion]['errors'] == 1)
+        try:
+            pool.pop(FailingQuestion)
+        except RuntimeError:
+            pass
+        else:
+            assert False, 'a failed generation was served'
+        wait_until(lambda: pool.stats()[ShortestPathQuestion]['ready'] == 3)
+        stats = pool.stats()
+    assert stats[ShortestPathQuestion] == {'ready': 3, 'pending': 0, 'hits': 2, 'misses': 0, 'errors': 0,
+                                           'hit_rate': 1.0}
+    assert stats[FailingQuestion]['misses'] == 1 and stats[FailingQuestion]['errors'] >= 1
+
+
+def test_question_pool_generates_in_processes_and_on_demand():
+    with lifecycle.QuestionPool([ShortestPathQuestion], capacity=2, workers=1, processes=True, binary=False) as pool:
+        wait_until(lambda: pool.stats()[ShortestPathQuestion]['ready'] == 2)
+        assert isinstance(pool.pop(ShortestPathQuestion), str)
+    # Once closed, the pool still serves what is queued, then generates instances on request.
+    ready = pool.stats()[ShortestPathQuestion]['ready']
+    assert ready > 0
+    for _ in range(ready + 1):
+        assert lifecycle.grade(pool.get(ShortestPathQuestion), [0, 1, 2, 3]) == (True, '')
+    stats = pool.stats()[ShortestPathQuestion]
+    assert (stats['ready'], stats['pending'], stats['misses']) == (0, 0, 1)
+
+
+class TokenQuestion(EdgeCountQuestion):
+    @memoize
+    def token(self, G):
+        return str(random.random())
+
+    def generate_question(self, graphs):
+        return self.token(graphs[0])
+
+    def generate_feedback(self, graphs, answer):
+        return answer == self.token(graphs[0]), ''
+
+
+def test_memoized_artifacts_survive_serialization():
+    instance = lifecycle.generate(EdgeCountQuestion)
+    assert '_artifacts' not in vars(instance.question) and len(instance.artifacts) == 3
+    for binary in (False, True):
+        loaded = lifecycle.Instance.loads(instance.dumps(binary=binary), EdgeCountQuestion)
+        assert lifecycle.grade(loaded, '') == (True, '')
+        assert loaded.question.calls == 3
+
+    # A recomputed token would differ, so the answer is only correct if the artifact was carried over.
+    with budget.Supervisor() as supervisor:
+        instance = supervisor.generate(TokenQuestion)
+        assert supervisor.grade(instance, instance.description) == (True, '')
+        assert lifecycle.grade(instance, instance.description) == (True, '')
@@ -0,0 +1,69 @@
+import pathlib
+import subprocess
+import sys
+
+import networkx as nx
+import numpy as np
+
+from graphquest import serialize
+from graphquest.question import QVertexSet
+
+
+class SelectQuestion(QVertexSet):
+    def generate_data(self):
+        pass
+
+    def generate_question(self, graphs):
+        pass
+
+    def generate_solutions(self, graphs):
+        pass
+
+    def generate_feedback(self, graphs, answer):
+        pass
+
+
+def assert_same_graph(G, H):
+    assert type(G) is type(H)
+    assert list(G.nodes(data=True)) == list(H.nodes(data=True))
+    assert list(G.edges(data=True)) == list(H.edges(data=True))
+    assert all(list(G.adj[v]) == list(H.adj[v]) for v in G)
+    if G.is_directed():
+        assert all(list(G.pred[v]) == list(H.pred[v]) for v in G)
+    # The attribute values are restored with their types, and each edge's dictionary is shared by its endpoints.
+    assert [list(map(type, d.values())) for _, d in G.nodes(data=True)] == \
+           [list(map(type, d.values())) for _, d in H.nodes(data=True)]
+    if type(G) is nx.Graph:
+        assert all(H.adj[u][v] is H.adj[v][u] for u, v in H.edges)
+
+
+def test_round_trip_keeps_order_and_attributes():
+    G = nx.Graph()
+    G.add_nodes_from([(3, {'x': 1, 'y': 2}), (7, {'x': 4, 'y': 0, 'label': 'b'}), (1, {'x': 2.5, 'y': 1})])
+    G.add_edges_from([(7, 3), (1, 3, {'weight': 2}), (1, 7), (7, 7)])
+    D = nx.DiGraph([('b', 'a'), ('a', 'c'), ('c', 'b')], name='cycle')
+    M = nx.MultiGraph([(0, 1), (0, 1), (1, 2)])
+    # Node 1's neighbours are [2, 0, 3], which is not the order in which A.edges() reaches them.
+    A = nx.Graph()
+    A.add_nodes_from([(0, {'x': 1, 'label': 'a', 'y': 2}), (1, {'x': 3, 'label': 'b', 'y': 4}),
+                      (2, {'x': np.int64(5), 'label': None, 'y': np.float32(0.5)}), (3, {'x': 0, 'label': 'd', 'y': 1})])
+    A.add_edges_from([(1, 2), (0, 1), (1, 3), (3, 0)])
+    T = nx.DiGraph([((0, 1), (1, 1)), ((1, 1), (0, 1)), ((1, 0), (0, 1)), ((1, 0), (1, 0))], weight=1.5)
+    graphs = [G, D, M, A, T]
+    for binary in (False, True):
+        _, loaded, _ = serialize.loads(serialize.dumps(SelectQuestion(), graphs, binary=binary), SelectQuestion)
+        for original, copy in zip(graphs, loaded):
+            assert_same_graph(original, copy)
+        assert list(loaded[3].nodes[0]) == ['x', 'label', 'y']
+        assert type(loaded[3].nodes[2]['x']) is np.int64 and type(loaded[3].nodes[2]['y']) is np.float32
+
+
+def test_output_does_not_depend_on_hash_seed():
+    root = pathlib.Path(__file__).parent.parent
+    code = ('import networkx as nx; from graphquest import serialize; from tests.test_serialize import SelectQuestion; '
+            "G = nx.Graph(); G.add_node(0, colour='red', x=1, shape='o', y=2, tag=None); "
+            'print(serialize.dumps(SelectQuestion(), G))')
+    outputs = {subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                              cwd=root, env={'PYTHONHASHSEED': str(seed), 'PYTHONPATH': str(root / 'src')}).stdout
+               for seed in range(4)}
+    assert len(outputs) == 1
@@ -0,0 +1,121 @@
+import networkx as nx
+
+from graphquest import lifecycle, solutions
+from graphquest.question import QEdgeSet, QVertexSet
+
+
+class StarCentreQuestion(QVertexSet):
+    cache_solutions = True
+    centre = 0
+
+    def generate_data(self):
+        return [nx.star_graph([self.centre] + [v for v in range(5) if v != self.centre])]
+
+    def generate_question(self, graphs):
+        return 'Select the centre of the star.'
+
+    def generate_solutions(self, graphs):
+        G = graphs[0]
+        return [[max(G, key=G.degree)]]
+
+    def generate_feedback(self, graphs, answer):
+        return True, ''
+
+
+def test_cache_relabels_solutions_for_isomorphic_graphs(tmp_path):
+    for path in (None, str(tmp_path / 'cache.db')):
+        cache = solutions.SolutionCache(path=path)
+        question = StarCentreQuestion()
+        first = question.generate_data()
+        cache.put(question, first, question.generate_solutions(first))
+
+        question.centre = 2
+        second = question.generate_data()
+        assert cache.get(question, second) == [[2]]
+        assert cache.hits == 1
+
+
+def test_cache_refuses_node_solutions_for_several_graphs():
+    question = StarCentreQuestion()
+    assert solutions.SolutionCache.applies(question, [nx.path_graph(3)])
+    assert not solutions.SolutionCache.applies(question, [nx.path_graph(3), nx.path_graph(3)])
+
+class DirectedEdgeQuestion(QEdgeSet):
+    def generate_data(self):
+        return [nx.DiGraph([(0, 1), (1, 0), (1, 2)])]
+
+    def generate_question(self, graphs):
+        return 'Select the edge from 0 to 1.'
+
+    def generate_solutions(self, graphs):
+        return [[[0, 1]]]
+
+    def generate_feedback(self, graphs, answer):
+        return True, ''
+
+
+def test_directed_edge_set_keeps_edge_direction():
+    index = solutions.SolutionIndex.build(DirectedEdgeQuestion(), [nx.DiGraph([(0, 1), (1, 0), (1, 2)])], [[[0, 1]]])
+    assert index.accepts([[0, 1]])
+    assert not index.accepts([[1, 0]])
+
+
+def test_directed_edge_set_question_is_graded_by_direction():
+    instance = lifecycle.generate(DirectedEdgeQuestion)
+    assert lifecycle.grade(instance, [[0, 1]]) == (True, '')
+    assert lifecycle.grade(instance, [[1, 0]]) == (False, '')
+
+
+def test_validators_check_the_property():
+    G = nx.cycle_graph(6)
+    G.add_edge(0, 3, weight=5)
+    assert solutions.ShortestPath(0, 3)(G, [0, 3])
+    assert not solutions.ShortestPath(0, 3)(G, [0, 1, 2, 3])
+    assert solutions.ShortestPath(0, 3, weight='weight')(G, [0, 1, 2, 3])
+    assert not solutions.ShortestPath(0, 3)(G, [0, 2, 3])
+    assert solutions.HamiltonianPath(cycle=True)(G, [0, 1, 2, 3, 4, 5, 0])
+    assert not solutions.HamiltonianPath(source=1)(G, [0, 1, 2, 3, 4, 5])
+    assert solutions.IndependentSet(k=3)(G, [0, 2, 4]) and not solutions.IndependentSet()(G, [0, 3])
+    assert solutions.Clique()(G, [0, 3]) and not solutions.Clique(k=3)(G, [0, 1, 2])
+    assert solutions.VertexCover()(G, [0, 2, 3, 4]) and not solutions.VertexCover()(G, [0, 2])
+    assert solutions.DominatingSet(k=2)(G, [0, 3]) and not solutions.DominatingSet()(G, [0])
+    assert solutions.SpanningTree()(G, [(0, 1), (1, 2), (2, 3), (3, 4), (4, 5)])
+    assert not solutions.SpanningTree(minimum=True)(G, [(0, 3), (1, 2), (0, 1), (3, 4), (4, 5)])
+    assert solutions.PerfectMatching()(G, [(0, 1), (2, 3), (5, 4)])
+    assert not solutions.Matching()(G, [(0, 1), (1, 2)]) and not solutions.Matching()(G, [(0, 2)])
+    assert solutions.MaximumMatching()(G, [(1, 2), (0, 5), (3, 4)])
+    assert not solutions.MaximumMatching()(G, [(1, 2), (3, 4)])
+
+
+def test_validators_round_trip_and_relabel():
+    validators = [solutions.ShortestPath(0, 3, weight='weight'), solutions.HamiltonianPath(source=1, cycle=True),
+                  solutions.Clique(k=3), solutions.SpanningTree(minimum=True), solutions.MaximumMatching()]
+    assert solutions.decode_solutions(solutions.encode_solutions(validators + [[0, 1]])) == validators + [[0, 1]]
+    assert solutions.ShortestPath(0, 3).relabel({0: 'a', 3: 'd'}) == solutions.ShortestPath('a', 'd')
+    assert solutions.HamiltonianPath().relabel({}) == solutions.HamiltonianPath()
+
+    index = solutions.SolutionIndex('QVertexSet', [[0, 2, 4], solutions.IndependentSet(k=2)])
+    index = solutions.SolutionIndex.from_dict(index.to_dict())
+    assert index.accepts([4, 2, 0], nx.cycle_graph(6))
+    assert index.accepts([1, 4], [nx.cycle_graph(6)])
+    assert not index.accepts([1, 2], nx.cycle_graph(6))
+    assert not index.accepts([[1, 2]], nx.cycle_graph(6))
+
+
+def test_set_solutions_are_stored_as_bitsets():
+    # More than 64 elements, so the bitsets don't fit in a machine word.
+    big = list(range(100))
+    index = solutions.SolutionIndex('QVertexSet', [[1, 2, 3], [3, 4], big])
+    assert index.elements[:4] == [1, 2, 3, 4] and all(isinstance(key, int) for key in index.keys)
+    index = solutions.SolutionIndex.from_dict(index.to_dict())
+    assert [3, 2, 1] in index and big[::-1] in index
+    assert [1, 2] not in index and [1, 2, 3, 200] not in index
+    assert index.distance([1, 2]) == 1 and index.distance([4, 200]) == 2 and index.distance(big[:-1]) == 1
+    assert index.partial([4]) and index.partial(big[:50]) and not index.partial([1, 200])
+    assert not solutions.SolutionIndex('QVertexSet', [[1, 2, 3], [3, 4]]).partial([1, 4])
+
+    edges = solutions.SolutionIndex('QEdgeSet', [[[0, 1], [2, 1]]])
+    edges = solutions.SolutionIndex.from_dict(edges.to_dict())
+    assert [[1, 0], [1, 2]] in edges and [[0, 1], [1, 2], [1, 2]] in edges
+    assert edges.distance([[0, 1], [2, 3]]) == 2 and edges.partial([[2, 1]])
+    assert solutions.SolutionIndex('QVertexSet').distance([1]) is None